@@ -0,0 +1,94 @@
+import numpy as np
+
+# Rodzaje zgłoszeń w harmonogramie
+CAR = 0
+PEDESTRIAN = 1
+
+# Kody kierunków pojazdów i przejść dla pieszych (indeksy w harmonogramie)
+DIRECTIONS = ('N', 'S', 'E', 'W')
+CROSSINGS = ('NS', 'SN', 'EW', 'WE')
+
+
+class FixedHeadway:
+    # Stały odstęp między zgłoszeniami (jak dawny pygame.time.set_timer)
+    def __init__(self, interval_ms, offset_ms=None):
+        self.interval_ms = interval_ms
+        self.offset_ms = interval_ms if offset_ms is None else offset_ms
+
+    def ticks(self, duration_ticks, fps, rng):
+        step = max(1, self.interval_ms * fps // 1000)
+        first = max(1, self.offset_ms * fps // 1000)
+        return np.arange(first, duration_ticks + 1, step, dtype=np.int64)
+
+
+class Poisson:
+    # Proces Poissona o stałej intensywności [zgłoszeń/s]
+    def __init__(self, rate):
+        self.rate = rate
+
+    def ticks(self, duration_ticks, fps, rng):
+        n = rng.poisson(self.rate * duration_ticks / fps)
+        return np.sort(rng.integers(1, duration_ticks + 1, n, dtype=np.int64))
+
+
+class DemandCurve:
+    # Niejednorodny proces Poissona: intensywność [zgłoszeń/s] interpolowana
+    # liniowo między punktami (times [s], rates [zgłoszeń/s]); metoda przerzedzania
+    def __init__(self, times, rates):
+        self.times = np.asarray(times, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+
+    def ticks(self, duration_ticks, fps, rng):
+        peak = float(self.rates.max())
+        if peak <= 0:
+            return np.zeros(0, dtype=np.int64)
+        candidates = Poisson(peak).ticks(duration_ticks, fps, rng)
+        rate = np.interp(candidates / fps, self.times, self.rates)
+        return candidates[rng.random(len(candidates)) * peak < rate]
+
+
+class ArrivalSchedule:
+    def __init__(self, ticks, kinds, codes, turns):
+        # Sortowanie po takcie, w obrębie taktu najpierw pojazdy (jak w dawnej pętli zdarzeń)
+        order = np.lexsort((kinds, ticks))
+        self.ticks = ticks[order]
+        self.kinds = kinds[order]
+        self.codes = codes[order]
+        self.turns = turns[order]
+        self.seek(0)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def seek(self, cursor):
+        # Ustawia kursor (np. przy odtwarzaniu stanu symulacji)
+        self.cursor = cursor
+        self.next_tick = int(self.ticks[cursor]) if cursor < len(self.ticks) else np.iinfo(np.int64).max
+
+    def due(self, tick):
+        # Indeksy zgłoszeń, których czas nadszedł; kursor przesuwa się tylko do przodu
+        if tick < self.next_tick:
+            return range(0)
+        start = self.cursor
+        end = start + int(np.searchsorted(self.ticks[start:], tick, side='right'))
+        self.seek(end)
+        return range(start, end)
+
+
+def build_schedule(rng, duration_ticks, fps, car_arrivals, ped_arrivals, turn_probability, start_tick=0):
+    # start_tick - harmonogram dla taktów start_tick + 1 ... start_tick + duration_ticks
+    car_ticks = car_arrivals.ticks(duration_ticks, fps, rng) + start_tick
+    ped_ticks = ped_arrivals.ticks(duration_ticks, fps, rng) + start_tick
+    n_cars, n_peds = len(car_ticks), len(ped_ticks)
+
+    car_codes = rng.integers(0, len(DIRECTIONS), n_cars)
+    ped_codes = rng.integers(0, len(CROSSINGS), n_peds)
+    # Decyzja o prawoskręcie losowana z góry razem z przyjazdem
+    car_turns = rng.random(n_cars) < turn_probability
+
+    return ArrivalSchedule(
+        np.concatenate([car_ticks, ped_ticks]),
+        np.concatenate([np.full(n_cars, CAR, dtype=np.int8), np.full(n_peds, PEDESTRIAN, dtype=np.int8)]),
+        np.concatenate([car_codes, ped_codes]).astype(np.int8),
+        np.concatenate([car_turns, np.zeros(n_peds, dtype=bool)]),
+    )
@@ -0,0 +1,309 @@
+import argparse
+
+import numpy as np
+
+from arrivals import CAR, build_schedule
+from numpy_engine import (AXIS, CAR_START, FRONT, LIGHT_THRESHOLD, PED_AXIS, PED_GROUP, PED_PASS_THRESHOLD,
+                          PED_SIGN, PED_START, PED_STEP, RIGHT, SIGN, TURN_THRESHOLD, car_collision_pairs, follow,
+                          new_pairs, pass_threshold, pedestrian_pairs)
+from intersection import (CAR_SPAWN_INTERVAL, DEFAULT_VARIANT, FPS, HEIGHT, LIGHT_CYCLE, PED_SPAWN_INTERVAL,
+                          SIM_SECONDS, TURN_RIGHT_PROBABILITY, VARIANTS, WIDTH, FixedHeadway, make_arrivals)
+
+# Silnik wielu replik: K niezależnych przebiegów (różne ziarna) liczonych krokiem
+# wspólnym. Sygnalizacja ma oś replik, a pojazdy i piesi wszystkich replik leżą w jednych
+# tablicach (jak w NumpySimulation) z numerem repliki - każda replika zajmuje tyle miejsca,
+# ilu ma agentów. Sąsiedzi szukani są po kluczach (replika, ...), więc koszt taktu rośnie
+# z łączną liczbą agentów, a nie z kwadratem najliczniejszej repliki. Replika k daje
+# te same wyniki co NumpySimulation(seeds[k]) dla tego samego wariantu.
+
+DIRECTION_GROUP = np.array([0, 0, 1, 1])   # N, S -> faza NS (0); E, W -> faza EW (1)
+
+
+class BatchedSimulation:
+    def __init__(self, seeds, duration=SIM_SECONDS, car_arrivals=None, ped_arrivals=None,
+                 variant=DEFAULT_VARIANT):
+        self.seeds = list(seeds)
+        K = self.replicas = len(self.seeds)
+        car_arrivals = car_arrivals or FixedHeadway(CAR_SPAWN_INTERVAL)
+        ped_arrivals = ped_arrivals or FixedHeadway(PED_SPAWN_INTERVAL)
+
+        # Harmonogramy replik (te same co w NumpySimulation) scalone w jedną tablicę
+        schedules = [
+            build_schedule(np.random.default_rng(seed), duration * FPS, FPS,
+                           car_arrivals, ped_arrivals, TURN_RIGHT_PROBABILITY)
+            for seed in self.seeds
+        ]
+        ticks = np.concatenate([s.ticks for s in schedules])
+        order = np.argsort(ticks, kind='stable')
+        self.arrival_ticks = ticks[order]
+        self.arrival_replica = np.concatenate([np.full(len(s), k) for k, s in enumerate(schedules)])[order]
+        self.arrival_kinds = np.concatenate([s.kinds for s in schedules])[order]
+        self.arrival_codes = np.concatenate([s.codes for s in schedules])[order].astype(np.int64)
+        self.arrival_turns = np.concatenate([s.turns for s in schedules])[order]
+        self.arrival_cursor = 0
+
+        self.variant = variant
+        self.pass_threshold = pass_threshold(variant)
+        # Czas czerwonego dla wszystkich między fazami (0 - stały cykl bez bufora)
+        self.buffer = variant.light.BUFFER
+
+        self.tick = 0
+        self.ped_collision_count = np.zeros(K, dtype=np.int64)
+        self.car_collision_count = np.zeros(K, dtype=np.int64)
+
+        # Sygnalizacja (logika TrafficLight / AllRedTrafficLight), faza 0 - NS, 1 - EW
+        self.light_timer = np.zeros(K, dtype=np.int64)
+        self.light_state = np.zeros(K, dtype=np.int64)
+        self.light_next_state = np.ones(K, dtype=np.int64)
+        self.pedestrian_state = np.zeros(K, dtype=np.int64)
+        self.buffer_active = np.zeros(K, dtype=bool)
+        self.buffer_timer = np.zeros(K, dtype=np.int64)
+
+        # Pojazdy wszystkich replik; w obrębie repliki kolejność pojawiania się (dopisywanie na końcu)
+        self.car_rep = np.zeros(0, dtype=np.int64)
+        self.car_id = np.zeros(0, dtype=np.int64)       # numeracja wspólna dla replik
+        self.car_pos = np.zeros((0, 2))
+        self.car_dir = np.zeros(0, dtype=np.int64)
+        self.car_speed = np.zeros(0)
+        self.passed_light = np.zeros(0, dtype=bool)
+        self.turn_right = np.zeros(0, dtype=bool)
+        self.has_turned = np.zeros(0, dtype=bool)
+        self.next_car_id = 0
+        # Aktywne pary kolidujących pojazdów zakodowane jako id_a << 32 | id_b (posortowane)
+        self.active_car_pairs = np.zeros(0, dtype=np.int64)
+
+        # Piesi wszystkich replik
+        self.ped_rep = np.zeros(0, dtype=np.int64)
+        self.ped_pos = np.zeros((0, 2))
+        self.ped_crossing = np.zeros(0, dtype=np.int64)
+        self.ped_speed = np.zeros(0)
+        self.ped_passed = np.zeros(0, dtype=bool)
+
+        # Czy przy pojeździe jest pieszy (jak w NumpySimulation)
+        self.pedestrian_near = None
+
+    @property
+    def elapsed_seconds(self):
+        return self.tick // FPS
+
+    # --- SYGNALIZACJA ---
+
+    def update_lights(self):
+        buffering = self.buffer_active.copy()
+        self.buffer_timer[buffering] += 1
+        done = buffering & (self.buffer_timer >= self.buffer)
+        self.light_state[done] = self.light_next_state[done]
+        self.pedestrian_state[done] = self.light_next_state[done]
+        self.buffer_active[done] = False
+        self.buffer_timer[done] = 0
+
+        cycling = ~buffering
+        self.light_timer[cycling] += 1
+        switch = cycling & (self.light_timer >= LIGHT_CYCLE)
+        self.light_timer[switch] = 0
+        if self.buffer:
+            self.buffer_active[switch] = True
+            self.light_next_state[switch] = 1 - self.light_state[switch]
+        else:
+            self.light_state[switch] = 1 - self.light_state[switch]
+            self.pedestrian_state[switch] = self.light_state[switch]
+
+    def vehicle_green(self):
+        # (K, 4): zielone dla kierunków N, S, E, W
+        return ~self.buffer_active[:, None] & (self.light_state[:, None] == DIRECTION_GROUP[None, :])
+
+    def pedestrian_green(self):
+        # (K, 2): zielone dla grup przejść NS/SN i EW/WE
+        return ~self.buffer_active[:, None] & (self.pedestrian_state[:, None] == np.arange(2)[None, :])
+
+    # --- POJAWIANIE SIĘ ---
+
+    def spawn_due(self):
+        # Zgłoszenia wszystkich replik z bieżącego taktu; zwraca True, gdy ktoś się pojawił.
+        # Zgłoszenia są posortowane stabilnie po takcie, więc w obrębie repliki zachowują jej kolejność.
+        start = self.arrival_cursor
+        end = start + int(np.searchsorted(self.arrival_ticks[start:], self.tick, side='right'))
+        if end == start:
+            return False
+        self.arrival_cursor = end
+        reps = self.arrival_replica[start:end]
+        cars = self.arrival_kinds[start:end] == CAR
+        codes = self.arrival_codes[start:end]
+
+        n = int(cars.sum())
+        if n:
+            dirs = codes[cars]
+            self.car_rep = np.concatenate([self.car_rep, reps[cars]])
+            self.car_id = np.concatenate([self.car_id, np.arange(self.next_car_id, self.next_car_id + n)])
+            self.next_car_id += n
+            self.car_pos = np.concatenate([self.car_pos, CAR_START[dirs]])
+            self.car_dir = np.concatenate([self.car_dir, dirs])
+            self.car_speed = np.concatenate([self.car_speed, np.full(n, 2.0)])
+            self.passed_light = np.concatenate([self.passed_light, np.zeros(n, dtype=bool)])
+            self.turn_right = np.concatenate([self.turn_right, self.arrival_turns[start:end][cars]])
+            self.has_turned = np.concatenate([self.has_turned, np.zeros(n, dtype=bool)])
+
+        n = len(codes) - n
+        if n:
+            crossings = codes[~cars]
+            self.ped_rep = np.concatenate([self.ped_rep, reps[~cars]])
+            self.ped_pos = np.concatenate([self.ped_pos, PED_START[crossings]])
+            self.ped_crossing = np.concatenate([self.ped_crossing, crossings])
+            self.ped_speed = np.concatenate([self.ped_speed, np.ones(n)])
+            self.ped_passed = np.concatenate([self.ped_passed, np.zeros(n, dtype=bool)])
+        return True
+
+    # --- RUCH ---
+
+    def pedestrian_proximity(self):
+        # Czy przy pojeździe jest którykolwiek pieszy z tej samej repliki
+        near = np.zeros(len(self.car_dir), dtype=bool)
+        near[pedestrian_pairs(self.car_rep, self.car_pos, self.ped_rep, self.ped_pos)[0]] = True
+        return near
+
+    def move_cars(self):
+        pos, d = self.car_pos, self.car_dir
+        n = len(d)
+        if n == 0:
+            return
+        rows = np.arange(n)
+        axis = AXIS[d]
+        front = SIGN[d] * pos[rows, axis] + FRONT[d]
+
+        # --- SPRAWDZENIE ŚWIATEŁ ---
+        green = self.vehicle_green()[self.car_rep, d]
+        waiting = ~self.has_turned & ~self.passed_light
+        stop = waiting & (front >= LIGHT_THRESHOLD[d]) & ~green
+        self.passed_light |= waiting & ~stop & (front > self.pass_threshold[d])
+
+        # --- PIESI W POBLIŻU ---
+        stop |= self.pedestrian_near
+
+        # --- NOWE POŁOŻENIE, GDYBY POJAZD RUSZYŁ ---
+        new_pos = pos.copy()
+        new_dir = d.copy()
+        new_turned = self.has_turned.copy()
+        speed = self.car_speed
+        turning = self.turn_right & ~self.has_turned & self.passed_light
+        r = RIGHT[d]
+        axis_r = AXIS[r]
+        inside = SIGN[r] * pos[rows, axis_r] < TURN_THRESHOLD[d]
+        side_step = turning & inside
+        finish = turning & ~inside
+        straight = ~turning
+        new_pos[rows[side_step], axis_r[side_step]] += (SIGN[r] * speed)[side_step]
+        new_pos[rows[straight], axis[straight]] += (SIGN[d] * speed)[straight]
+        new_dir[finish] = r[finish]
+        new_turned |= finish
+
+        # --- JAZDA ZA POPRZEDZAJĄCYM POJAZDEM ---
+        # Jak w NumpySimulation, z repliką jako grupą: pary tylko w obrębie repliki
+        moving = follow(self.car_rep, pos, d, new_pos, new_dir, stop)
+
+        self.car_pos = np.where(moving[:, None], new_pos, pos)
+        self.car_dir = np.where(moving, new_dir, d)
+        self.has_turned = np.where(moving, new_turned, self.has_turned)
+
+    def move_pedestrians(self):
+        c = self.ped_crossing
+        if len(c) == 0:
+            return
+        walking = self.ped_passed | self.pedestrian_green()[self.ped_rep, PED_GROUP[c]]
+        self.ped_pos += PED_STEP[c] * (self.ped_speed * walking)[:, None]
+        rows = np.arange(len(c))
+        reached = PED_SIGN[c] * self.ped_pos[rows, PED_AXIS[c]] >= PED_PASS_THRESHOLD[c]
+        self.ped_passed |= walking & reached
+
+    # --- KOLIZJE ---
+
+    def detect_pedestrian_collisions(self):
+        c, p = pedestrian_pairs(self.car_rep, self.car_pos, self.ped_rep, self.ped_pos)
+        hit = np.zeros(len(self.ped_crossing), dtype=bool)
+        hit[p] = True
+        self.ped_collision_count += np.bincount(self.ped_rep[hit], minlength=self.replicas)
+        keep = ~hit
+        self.pedestrian_near = np.zeros(len(self.car_dir), dtype=bool)
+        self.pedestrian_near[c[keep[p]]] = True
+        self.ped_rep = self.ped_rep[keep]
+        self.ped_pos = self.ped_pos[keep]
+        self.ped_crossing = self.ped_crossing[keep]
+        self.ped_speed = self.ped_speed[keep]
+        self.ped_passed = self.ped_passed[keep]
+
+    def detect_car_collisions(self):
+        pairs, first = car_collision_pairs(self.car_rep, self.car_pos, self.car_id)
+        # Nowa kolizja liczy się tylko wtedy, gdy para nie zderzała się w poprzednim takcie
+        new = first[new_pairs(pairs, self.active_car_pairs)]
+        self.car_collision_count += np.bincount(self.car_rep[new], minlength=self.replicas)
+        self.active_car_pairs = pairs
+
+    def despawn(self):
+        pos = self.car_pos
+        keep = (pos[:, 0] >= 0) & (pos[:, 0] <= WIDTH) & (pos[:, 1] >= 0) & (pos[:, 1] <= HEIGHT)
+        if not keep.all():
+            self.pedestrian_near = self.pedestrian_near[keep]
+            self.car_rep = self.car_rep[keep]
+            self.car_id = self.car_id[keep]
+            self.car_pos = self.car_pos[keep]
+            self.car_dir = self.car_dir[keep]
+            self.car_speed = self.car_speed[keep]
+            self.passed_light = self.passed_light[keep]
+            self.turn_right = self.turn_right[keep]
+            self.has_turned = self.has_turned[keep]
+
+        pos = self.ped_pos
+        keep = (pos[:, 0] >= 0) & (pos[:, 0] <= WIDTH) & (pos[:, 1] >= 0) & (pos[:, 1] <= HEIGHT)
+        if not keep.all():
+            self.ped_rep = self.ped_rep[keep]
+            self.ped_pos = self.ped_pos[keep]
+            self.ped_crossing = self.ped_crossing[keep]
+            self.ped_speed = self.ped_speed[keep]
+            self.ped_passed = self.ped_passed[keep]
+            self.pedestrian_near = self.pedestrian_proximity()
+
+    def step(self):
+        self.update_lights()
+        self.tick += 1
+
+        # Bliskość po nowym przyjeździe liczymy dla wszystkich replik - w pozostałych wynik
+        # jest taki sam jak zapamiętany z detekcji kolizji
+        if self.spawn_due() or self.pedestrian_near is None:
+            self.pedestrian_near = self.pedestrian_proximity()
+
+        self.move_cars()
+        self.move_pedestrians()
+        self.detect_pedestrian_collisions()
+        self.detect_car_collisions()
+        self.despawn()
+
+
+def run_replicas(seeds, duration=SIM_SECONDS, arrivals='fixed', variant=DEFAULT_VARIANT):
+    sim = BatchedSimulation(seeds, duration, *make_arrivals(arrivals), variant)
+    for _ in range(duration * FPS):
+        sim.step()
+    return sim
+
+
+def main():
+    from run_simulation import replica_seeds
+
+    parser = argparse.ArgumentParser(description="Symulacja skrzyżowania - wiele replik naraz (bez okna)")
+    parser.add_argument("--replicas", "-k", type=int, default=100, help="liczba replik")
+    parser.add_argument("--duration", "-d", type=int, default=SIM_SECONDS,
+                        help="czas symulacji w sekundach")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno główne replik")
+    parser.add_argument("--arrivals", choices=["fixed", "poisson"], default="fixed",
+                        help="przyjazdy co stały odstęp albo proces Poissona")
+    parser.add_argument("--variant", choices=list(VARIANTS), default=DEFAULT_VARIANT.name,
+                        help="wariant skrzyżowania (sterownik sygnalizacji i progi)")
+    args = parser.parse_args()
+
+    sim = run_replicas(replica_seeds(args.seed, args.replicas), args.duration, args.arrivals,
+                       VARIANTS[args.variant])
+    print(f"Symulacja {args.replicas} replik zakończona po {args.duration} s.")
+    print(f"Średnia liczba kolizji pieszych: {sim.ped_collision_count.mean():.2f}")
+    print(f"Średnia liczba kolizji pojazdów: {sim.car_collision_count.mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+import numpy as np
+
+import batched_engine
+import intersection
+import numpy_engine
+from arrivals import CROSSINGS, DIRECTIONS
+from intersection import (HEIGHT, TURN_RIGHT_PROBABILITY, VARIANTS, WIDTH, Car, Pedestrian, Simulation,
+                          detect_car_collisions, detect_pedestrian_collisions, draw_intersection)
+from lanes import progress
+
+# Pomiary wydajności silnika: takty/s przy zadanej liczbie agentów (silnik obiektowy i NumPy),
+# koszt poszczególnych etapów taktu, przebiegi/s w jednym procesie (kolejno w każdym silniku
+# i naraz w batched_engine.py) oraz całej paczki (run_simulation.py) przy różnej liczbie procesów.
+# Wyniki trafiają do pliku JSON; z --baseline porównujemy je z zapisanym punktem odniesienia.
+
+# Postęp (lanes.progress) środka skrzyżowania - pojazd dalej minął już sygnalizator
+CENTER_PROGRESS = {'N': -(HEIGHT // 2), 'S': HEIGHT // 2, 'E': WIDTH // 2, 'W': -(WIDTH // 2)}
+
+
+def populated_state(agents, seed=0, variant=VARIANTS['skrzyzowanie_3'], ped_share=0.25):
+    # Migawka symulacji z agents agentami rozłożonymi losowo wzdłuż pasów i przejść,
+    # bez dalszych przyjazdów - gęstość nie zależy od harmonogramu
+    sim = Simulation(seed, 0, variant=variant)
+    rng = sim.rng
+    n_peds = round(agents * ped_share)
+
+    cars = []
+    for code in rng.integers(len(DIRECTIONS), size=agents - n_peds).tolist():
+        direction = DIRECTIONS[code]
+        car = Car(direction, bool(rng.random() < TURN_RIGHT_PROBABILITY), variant.pass_margin)
+        if direction in ('N', 'S'):
+            car.y = float(rng.uniform(0, HEIGHT))
+        else:
+            car.x = float(rng.uniform(0, WIDTH))
+        car.passed_light = progress(car) > CENTER_PROGRESS[direction]
+        cars.append(car)
+    # Od czoła kolejki - każdy kolejny pojazd dołącza na końcu pasu
+    cars.sort(key=progress, reverse=True)
+    for car in cars:
+        sim.cars.append(car)
+        sim.lanes.add(car)
+
+    for code in rng.integers(len(CROSSINGS), size=n_peds).tolist():
+        ped = Pedestrian(CROSSINGS[code])
+        # Od miejsca startu do krawędzi ekranu, w kierunku marszu
+        if ped.crossing == 'NS':
+            ped.y = float(rng.uniform(0, ped.y))
+            ped.passed_light = ped.y <= HEIGHT // 2 + 40
+        elif ped.crossing == 'SN':
+            ped.y = float(rng.uniform(ped.y, HEIGHT))
+            ped.passed_light = ped.y >= HEIGHT // 2 - 40
+        elif ped.crossing == 'EW':
+            ped.x = float(rng.uniform(ped.x, WIDTH))
+            ped.passed_light = ped.x >= WIDTH // 2 - 40
+        else:
+            ped.x = float(rng.uniform(0, ped.x))
+            ped.passed_light = ped.x <= WIDTH // 2 + 40
+        sim.pedestrians.append(ped)
+    return sim.snapshot()
+
+
+def measure(setup, run, budget, repeat=3):
+    # Najlepszy czas run(setup()) - setup poza pomiarem; co najmniej repeat powtórzeń.
+    # Drugi wynik to rozrzut: o ile mediana jest gorsza od najlepszego (względnie)
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - started < budget:
+        args = setup()
+        t0 = time.perf_counter()
+        run(*args)
+        times.append(time.perf_counter() - t0)
+    best = min(times)
+    return best, median(times) / best - 1
+
+
+def bench_step(state, ticks, budget, engine=Simulation):
+    # Pełny takt step() silnika engine (Simulation albo NumpySimulation); ticks taktów od
+    # tego samego stanu, żeby gęstość nie zdążyła spaść przez wyjeżdżające pojazdy
+    def run(sim):
+        for _ in range(ticks):
+            sim.step()
+
+    best, spread = measure(lambda: (engine.restore(state),), run, budget)
+    return ticks / best, spread
+
+
+def bench_components(state, budget, draw=True):
+    def fresh():
+        sim = Simulation.restore(state)
+        sim.light.update()
+        return sim
+
+    def car_move(sim, near):
+        # Jak w Simulation.step(): ruch i aktualizacja kolejki pasa
+        for car, stop in zip(sim.cars, near):
+            car.move(sim.light, sim.lanes, stop)
+            sim.lanes.update(car)
+
+    def pedestrian_collisions(sim):
+        # Razem z maską bliskości, z której korzysta detekcja
+        detect_pedestrian_collisions(sim.pedestrians, sim.pedestrian_proximity().any(axis=0).tolist())
+
+    costs = {
+        'Car.move': measure(lambda: (lambda sim: (sim, sim.pedestrian_proximity().any(axis=1).tolist()))(fresh()),
+                            car_move, budget),
+        'detect_car_collisions': measure(lambda: (fresh().cars, set()), detect_car_collisions, budget),
+        'detect_pedestrian_collisions': measure(lambda: (fresh(),), pedestrian_collisions, budget),
+    }
+    if draw:
+        import pygame
+        from render_cache import RenderCache
+
+        pygame.font.init()
+        win = pygame.Surface((WIDTH, HEIGHT))
+        cache = RenderCache(display=False)
+        sim = fresh()
+        frame = (win, cache, sim.light, sim.cars, sim.pedestrians, 0, 0, 0)
+        costs['draw_intersection'] = measure(lambda: frame, draw_intersection, budget)
+    return costs
+
+
+def bench_replicas(replicas, duration, variant, repeat=3):
+    # Przebiegi/s w jednym procesie: po kolei w silniku obiektowym i NumPy, naraz w batched_engine
+    from run_simulation import replica_seeds
+
+    seeds = replica_seeds(0, replicas)
+    runs = {
+        'intersection': lambda: [intersection.run_headless(duration, seed, 'fixed', variant) for seed in seeds],
+        'numpy_engine': lambda: [numpy_engine.run_headless(duration, seed, 'fixed', variant) for seed in seeds],
+        'batched_engine': lambda: batched_engine.run_replicas(seeds, duration, 'fixed', variant),
+    }
+    rates = {}
+    for name, run in runs.items():
+        best, spread = measure(tuple, run, 0, repeat)
+        rates[name] = replicas / best, spread
+    return rates
+
+
+def bench_batch(worker_counts, replicas, duration, script, repeat=3):
+    from run_simulation import run_batch
+
+    rates = {}
+    for workers in worker_counts:
+        best, spread = measure(tuple, lambda: run_batch(script, replicas, 0, duration, workers=workers), 0, repeat)
+        rates[workers] = replicas / best, spread
+    return rates
+
+
+def metric(value, unit, better, spread=0.0):
+    # spread - względny rozrzut powtórzeń (measure), poszerza próg regresji w compare
+    return {'value': value, 'unit': unit, 'better': better, 'spread': spread}
+
+
+def run_benchmarks(args):
+    variant = VARIANTS[args.variant]
+    metrics = {}
+    for agents in args.agents:
+        state = populated_state(agents, args.seed, variant)
+        # Przy dużej gęstości krótsze okno, żeby pomiar trwał rozsądnie
+        ticks = max(3, min(args.ticks, 30000 // agents))
+        rate, spread = bench_step(state, ticks, args.budget)
+        metrics[f'step[{agents}]'] = metric(rate, 'takty/s', 'higher', spread)
+        print(f"{agents:>6} agentów: {rate:10.1f} taktów/s")
+        rate, spread = bench_step(state, ticks, args.budget, numpy_engine.NumpySimulation)
+        metrics[f'numpy_step[{agents}]'] = metric(rate, 'takty/s', 'higher', spread)
+        print(f"{'':>14}{'NumpySimulation.step':<30}{rate:10.1f} taktów/s")
+        for name, (cost, spread) in bench_components(state, args.budget, draw=not args.no_draw).items():
+            metrics[f'{name}[{agents}]'] = metric(cost * 1000, 'ms/takt', 'lower', spread)
+            print(f"{'':>14}{name:<30}{cost * 1000:10.3f} ms/takt")
+
+    if not args.no_replicas:
+        for engine, (rate, spread) in bench_replicas(args.engine_replicas, args.duration, variant, args.repeat).items():
+            metrics[f'replicas[{engine}]'] = metric(rate, 'przebiegi/s', 'higher', spread)
+            print(f"{args.engine_replicas} przebiegów, {engine + ':':<16}{rate:8.2f} przebiegów/s")
+
+    if not args.no_batch:
+        script = str(Path(__file__).with_name('intersection.py'))
+        for workers, (rate, spread) in bench_batch(args.workers, args.replicas, args.duration, script,
+                                                   args.repeat).items():
+            metrics[f'batch[workers={workers}]'] = metric(rate, 'przebiegi/s', 'higher', spread)
+            print(f"paczka, {workers} proc.: {rate:8.2f} przebiegów/s")
+
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'settings': {
+            'variant': args.variant, 'seed': args.seed, 'ticks': args.ticks, 'budget': args.budget,
+            'replicas': args.replicas, 'engine_replicas': args.engine_replicas, 'duration': args.duration,
+            'repeat': args.repeat,
+        },
+        'metrics': metrics,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Zmiana względem punktu odniesienia (najlepsze z powtórzeń); regresja, gdy wynik gorszy
+    # o więcej niż tolerance plus większy z rozrzutów obu pomiarów - szum krótkich pomiarów
+    # nie jest regresją
+    regressions = []
+    print(f"\n{'pomiar':<44}{'odniesienie':>14}{'teraz':>14}{'zmiana':>10}{'próg':>8}")
+    for name, current in results['metrics'].items():
+        reference = baseline['metrics'].get(name)
+        if reference is None:
+            print(f"{name:<44}{'-':>14}{current['value']:14.3f}{'nowy':>10}")
+            continue
+        change = current['value'] / reference['value'] - 1
+        worse = -change if current['better'] == 'higher' else change
+        threshold = tolerance + max(current.get('spread', 0.0), reference.get('spread', 0.0))
+        flag = ''
+        if worse > threshold:
+            regressions.append(name)
+            flag = '  <-- regresja'
+        print(f"{name:<44}{reference['value']:14.3f}{current['value']:14.3f}{change:+10.1%}{threshold:8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pomiary wydajności silnika symulacji skrzyżowania")
+    parser.add_argument("--agents", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="liczby agentów (pojazdy i piesi) w pomiarach taktu")
+    parser.add_argument("--variant", choices=list(VARIANTS), default="skrzyzowanie_3")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno rozmieszczenia agentów")
+    parser.add_argument("--ticks", type=int, default=30, help="liczba taktów w jednym pomiarze")
+    parser.add_argument("--budget", type=float, default=1.0, help="czas jednego pomiaru [s]")
+    parser.add_argument("--workers", "-w", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                        help="liczby procesów w pomiarze paczki")
+    parser.add_argument("--replicas", type=int, default=8, help="liczba przebiegów w pomiarze paczki")
+    parser.add_argument("--duration", type=int, default=20, help="czas jednego przebiegu (paczka i silniki w jednym procesie) [s]")
+    parser.add_argument("--engine-replicas", type=int, default=64,
+                        help="liczba przebiegów w pomiarze silników w jednym procesie")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="powtórzenia pomiaru przebiegów i paczki (liczy się najlepsze)")
+    parser.add_argument("--no-batch", action="store_true", help="bez pomiaru paczki")
+    parser.add_argument("--no-replicas", action="store_true", help="bez pomiaru silników w jednym procesie")
+    parser.add_argument("--no-draw", action="store_true", help="bez pomiaru rysowania (pygame)")
+    parser.add_argument("--output", "-o", default="benchmark.json", help="plik JSON z wynikami")
+    parser.add_argument("--baseline", default=None, help="plik JSON z punktem odniesienia do porównania")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="zapisz wyniki jako nowy punkt odniesienia (plik --baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="dopuszczalne pogorszenie względem odniesienia (domyślnie 0.10, czyli 10%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nWyniki zapisane w pliku: {args.output}")
+
+    if args.baseline is None:
+        return
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Punkt odniesienia zapisany w pliku: {args.baseline}")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegresje ({len(regressions)}): {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nBez regresji względem punktu odniesienia.")
+
+
+if __name__ == "__main__":
+    main()
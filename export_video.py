@@ -0,0 +1,111 @@
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from intersection import FPS, HEIGHT, WIDTH, draw_intersection
+from trajectory import Trajectory
+
+# Eksport zapisanej trajektorii (trajectory.py) do sekwencji PNG albo filmu, bez okna.
+# Zakres klatek dzielony jest między procesy; każdy rysuje swoje klatki tym samym
+# draw_intersection co tryb z oknem, na powierzchni poza ekranem.
+
+VIDEO_SUFFIXES = ('.mp4', '.mkv', '.mov', '.avi', '.webm')
+
+
+def render_frames(path, ticks):
+    import pygame
+    from render_cache import RenderCache
+
+    pygame.font.init()
+    trajectory = Trajectory(path)
+    win = pygame.Surface((WIDTH, HEIGHT))
+    cache = RenderCache(display=False)
+    for tick in ticks:
+        draw_intersection(win, cache, *trajectory.frame(tick), tick // FPS)
+        yield win
+
+
+def export_images(path, ticks, first_frame, directory):
+    import pygame
+
+    for number, win in enumerate(render_frames(path, ticks), start=first_frame):
+        pygame.image.save(win, os.path.join(directory, f"frame_{number:06d}.png"))
+    return len(ticks)
+
+
+def export_segment(path, ticks, output, fps):
+    import pygame
+
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{WIDTH}x{HEIGHT}", "-r", str(fps), "-i", "-",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", output,
+    ]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as ffmpeg:
+        for win in render_frames(path, ticks):
+            ffmpeg.stdin.write(pygame.image.tobytes(win, "RGB"))
+        ffmpeg.stdin.close()
+    if ffmpeg.returncode:
+        raise RuntimeError(f"ffmpeg zakończył się kodem {ffmpeg.returncode}")
+    return len(ticks)
+
+
+def export(path, output, step=2, start=None, end=None, workers=None):
+    # step - co ile taktów klatka (2 przy FPS = 60 daje film 30 kl./s w czasie rzeczywistym);
+    # zakres przycinany do zapisanych taktów (zapis od migawki nie zaczyna się od taktu 1)
+    trajectory = Trajectory(path)
+    first, last = trajectory.first, trajectory.last
+    start = first if start is None else max(start, first)
+    end = last if end is None else min(end, last)
+    ticks = range(start, end + 1, step)
+    if not ticks:
+        print("Pusty zakres - nic do eksportu.")
+        return
+    workers = workers or os.cpu_count() or 1
+    size = -(-len(ticks) // workers)
+    parts = [ticks[i:i + size] for i in range(0, len(ticks), size)]
+    video = Path(output).suffix.lower() in VIDEO_SUFFIXES
+
+    if not video:
+        os.makedirs(output, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = sum(pool.map(export_images, [path] * len(parts), parts,
+                                  [i * size for i in range(len(parts))], [output] * len(parts)))
+        print(f"Zapisano {frames} klatek do katalogu: {output}")
+        return
+
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("Eksport filmu wymaga programu ffmpeg (albo podaj katalog na klatki PNG).")
+    fps = FPS / step
+    with tempfile.TemporaryDirectory(dir=Path(output).resolve().parent) as tmp:
+        segments = [os.path.join(tmp, f"part_{i:04d}{Path(output).suffix}") for i in range(len(parts))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = sum(pool.map(export_segment, [path] * len(parts), parts, segments, [fps] * len(parts)))
+        # Odcinki mają te same parametry, więc sklejamy je bez ponownego kodowania
+        listing = os.path.join(tmp, "segments.txt")
+        with open(listing, "w") as f:
+            f.writelines(f"file '{segment}'\n" for segment in segments)
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                        "-i", listing, "-c", "copy", output], check=True)
+    print(f"Zapisano film ({frames} klatek, {fps:g} kl./s) do pliku: {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksport zapisanej trajektorii do klatek PNG albo filmu")
+    parser.add_argument("path", help="plik zapisu (--record w skrzyzowanie*.py / numpy_engine.py)")
+    parser.add_argument("output", help="katalog na klatki PNG albo plik filmu (.mp4, .mkv, ...; wymaga ffmpeg)")
+    parser.add_argument("--step", type=int, default=2, help="co ile taktów klatka (domyślnie 2, czyli 30 kl./s)")
+    parser.add_argument("--start", type=int, default=None, help="pierwszy takt (domyślnie początek zapisu)")
+    parser.add_argument("--end", type=int, default=None, help="ostatni takt (domyślnie koniec zapisu)")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                        help="liczba procesów (domyślnie liczba rdzeni)")
+    args = parser.parse_args()
+    export(args.path, args.output, args.step, args.start, args.end, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,856 @@
+import argparse
+import pickle
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from arrivals import (CAR, CROSSINGS, DIRECTIONS, ArrivalSchedule, FixedHeadway, Poisson,
+                      build_schedule)
+from lanes import LaneIndex
+from proximity import pedestrian_proximity, positions
+from spatial_hash import close_pairs
+
+# Wspólny silnik symulacji skrzyżowania. Warianty (skrzyzowanie.py, skrzyzowanie_2.py,
+# skrzyzowanie_3.py) różnią się tylko sterownikiem sygnalizacji i progiem minięcia
+# sygnalizatora - opisuje je Variant.
+
+# pygame (i okno) ładowane dopiero przez tryb z oknem - import modułu nie uruchamia SDL
+
+# Ustawienia okna
+WIDTH, HEIGHT = 800, 800
+
+# Kolory
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+GRAY = (150, 150, 150)
+YELLOW = (255, 255, 0)
+
+# Parametry
+FPS = 60
+LIGHT_CYCLE = 300
+CAR_SIZE = 20
+PEDESTRIAN_SIZE = 10
+# Prostokąt obejmujący sygnalizatory dla pojazdów i pieszych (odświeżany co klatkę)
+LIGHTS_AREA = (WIDTH // 2 - 60, HEIGHT // 2 - 60, 130, 130)
+
+# Czas symulacji [s] i odstępy między pojawianiem się pojazdów/pieszych [ms]
+SIM_SECONDS = 60
+CAR_SPAWN_INTERVAL = 1500
+PED_SPAWN_INTERVAL = 3000
+TURN_RIGHT_PROBABILITY = 0.3
+# Mnożniki prędkości trybu z oknem (klawisze 1, 2, 3); None - tak szybko, jak się da
+SPEEDS = {'1': 1, '10': 10, 'max': None}
+
+
+# Sterowniki sygnalizacji. Wspólny interfejs: update() co takt, vehicle_green(direction),
+# pedestrian_green(crossing) oraz atrybuty state, pedestrian_state i buffer_active
+# (czytane przez rysowanie i silniki NumPy). idle_ticks() i advance(n) służą do przeskoku
+# nad taktami bez ruchu (Simulation.skip_idle).
+class TrafficLight:
+    # Stały cykl: zielone przełącza się między NS i EW co LIGHT_CYCLE taktów
+    BUFFER = 0
+
+    def __init__(self):
+        self.timer = 0
+        self.state = 'NS'  # NS zielone dla pojazdów jadących z północy i południa
+        self.pedestrian_state = 'NS'  # synchronizacja pieszych z pojazdami
+        self.buffer_active = False
+
+    def update(self):
+        self.timer += 1
+        if self.timer >= LIGHT_CYCLE:
+            self.timer = 0
+            if self.state == 'NS':
+                self.state = 'EW'
+                self.pedestrian_state = 'EW'
+            else:
+                self.state = 'NS'
+                self.pedestrian_state = 'NS'
+
+    def idle_ticks(self):
+        # Ile kolejnych update() nie zmieni świateł
+        return max(LIGHT_CYCLE - self.timer - 1, 0)
+
+    def advance(self, n):
+        # n wywołań update(), n <= idle_ticks()
+        self.timer += n
+
+    def vehicle_green(self, direction):
+        if self.buffer_active:
+            return False
+        if direction in ['N', 'S']:
+            return self.state == 'NS'
+        else:
+            return self.state == 'EW'
+
+    def pedestrian_green(self, crossing):
+        # crossing: 'NS', 'SN', 'EW', 'WE'
+        if self.buffer_active:
+            return False
+        if crossing in ['NS', 'SN']:
+            return self.pedestrian_state == 'NS'
+        else:
+            return self.pedestrian_state == 'EW'
+
+
+class AllRedTrafficLight(TrafficLight):
+    # Między fazami BUFFER taktów czerwonego dla wszystkich (pojazdy i piesi)
+    BUFFER = 3 * FPS
+
+    def __init__(self):
+        super().__init__()
+        self.next_state = 'EW'
+        self.buffer_timer = 0
+
+    def update(self):
+        if self.buffer_active:
+            self.buffer_timer += 1
+            if self.buffer_timer >= self.BUFFER:
+                self.state = self.next_state
+                self.pedestrian_state = self.next_state
+                self.buffer_active = False
+                self.buffer_timer = 0
+            return
+
+        self.timer += 1
+        if self.timer >= LIGHT_CYCLE:
+            self.timer = 0
+            self.buffer_active = True
+            self.next_state = 'EW' if self.state == 'NS' else 'NS'
+
+    def idle_ticks(self):
+        if self.buffer_active:
+            return max(self.BUFFER - self.buffer_timer - 1, 0)
+        return super().idle_ticks()
+
+    def advance(self, n):
+        if self.buffer_active:
+            self.buffer_timer += n
+        else:
+            self.timer += n
+
+
+@dataclass(frozen=True)
+class Variant:
+    name: str
+    light: type         # klasa sterownika sygnalizacji
+    pass_margin: int    # odległość od środka skrzyżowania, po której pojazd mija sygnalizator [px]
+
+
+VARIANTS = {
+    'skrzyzowanie': Variant('skrzyzowanie', TrafficLight, 10),
+    'skrzyzowanie_2': Variant('skrzyzowanie_2', TrafficLight, 10),
+    'skrzyzowanie_3': Variant('skrzyzowanie_3', AllRedTrafficLight, 20),
+}
+DEFAULT_VARIANT = VARIANTS['skrzyzowanie_3']
+
+
+class Car:
+    car_id_counter = 0
+    SPEED = 2   # px na takt
+
+    def __init__(self, direction, turn_right=False, pass_margin=DEFAULT_VARIANT.pass_margin):
+        self.direction = direction
+        self.pass_margin = pass_margin
+        self.speed = self.SPEED
+        self.passed_light = False
+        self.id = Car.car_id_counter
+        Car.car_id_counter += 1
+
+        # Decyzja o prawoskręcie (losowana w harmonogramie przyjazdów) i flaga zakończenia skrętu
+        self.turn_right = turn_right
+        self.has_turned = False
+        # Miejsce w kolejce pasa (ustawiane przez LaneIndex)
+        self.lane = None
+        self.lane_key = None
+        self.lane_ahead = None
+        self.lane_behind = None
+
+        # Współrzędne początkowe zgodnie z ruchem prawostronnym:
+        if direction == 'N':
+            self.x = WIDTH // 2 + 10
+            self.y = HEIGHT
+        elif direction == 'S':
+            self.x = WIDTH // 2 - 30
+            self.y = -CAR_SIZE
+        elif direction == 'E':
+            self.x = -CAR_SIZE
+            self.y = HEIGHT // 2 + 10
+        elif direction == 'W':
+            self.x = WIDTH
+            self.y = HEIGHT // 2 - 30
+
+    def move(self, light, lanes, pedestrian_near):
+        # Zwraca False, gdy pojazd stoi (jego stan się nie zmienił)
+        stop = False
+        OFFSET = 100
+        margin = self.pass_margin
+
+        # --- SPRAWDZENIE ŚWIATEŁ (tylko jeśli jeszcze nie minął punktu krytycznego) ---
+        if not self.has_turned:
+            if self.direction == 'N':
+                light_pos = HEIGHT // 2 + 10 + OFFSET
+                if (not self.passed_light) and (self.y <= light_pos) and (not light.vehicle_green('N')):
+                    stop = True
+                elif (not self.passed_light) and (self.y < HEIGHT // 2 + margin):
+                    self.passed_light = True
+            elif self.direction == 'S':
+                light_pos = HEIGHT // 2 - 10 - OFFSET
+                if (not self.passed_light) and (self.y + CAR_SIZE >= light_pos) and (not light.vehicle_green('S')):
+                    stop = True
+                elif (not self.passed_light) and (self.y + CAR_SIZE > HEIGHT // 2 - margin):
+                    self.passed_light = True
+            elif self.direction == 'E':
+                light_pos = WIDTH // 2 - 10 - OFFSET
+                if (not self.passed_light) and (self.x + CAR_SIZE >= light_pos) and (not light.vehicle_green('E')):
+                    stop = True
+                elif (not self.passed_light) and (self.x + CAR_SIZE > WIDTH // 2 - margin):
+                    self.passed_light = True
+            elif self.direction == 'W':
+                light_pos = WIDTH // 2 + 10 + OFFSET
+                if (not self.passed_light) and (self.x <= light_pos) and (not light.vehicle_green('W')):
+                    stop = True
+                elif (not self.passed_light) and (self.x < WIDTH // 2 + margin):
+                    self.passed_light = True
+
+        # --- UNIKANIE KOLIZJI Z INNYMI POJAZDAMI jadącymi w tym samym kierunku ---
+        # Wystarczy najbliższy pojazd przed nami na tym samym pasie (kolejka pasa)
+        if lanes.blocked(self, CAR_SIZE + 5):
+            stop = True
+
+        # --- UNIKANIE ZBYT BLISKIEGO KONTAKTU Z PIESZYMI ---
+        # (maska bliskości pojazd x pieszy liczona raz na takt w Simulation)
+        if pedestrian_near:
+            stop = True
+
+        if stop:
+            return False
+
+        # --- LOGIKA SKRĘTU W PRAWO (dopasowana, by jechać po ćwiartce skrzyżowania, nie środku) ---
+        if self.turn_right and not self.has_turned:
+            # Faza dojazdu do sygnalizatora
+            if self.direction == 'N':
+                if not self.passed_light:
+                    self.y -= self.speed
+                else:
+                    # Po minięciu sygnalizatora skręcamy w prawo: jedziemy na wschód
+                    if self.x < WIDTH // 2 + 60:
+                        self.x += self.speed
+                    else:
+                        self.has_turned = True
+                        self.direction = 'E'
+            elif self.direction == 'E':
+                if not self.passed_light:
+                    self.x += self.speed
+                else:
+                    # Po minięciu sygnalizatora skręcamy w prawo: jedziemy na południe
+                    if self.y < HEIGHT // 2 + 60:
+                        self.y += self.speed
+                    else:
+                        self.has_turned = True
+                        self.direction = 'S'
+            elif self.direction == 'S':
+                if not self.passed_light:
+                    self.y += self.speed
+                else:
+                    # Skręt w prawo: jedziemy na zachód
+                    if self.x > WIDTH // 2 - 60:
+                        self.x -= self.speed
+                    else:
+                        self.has_turned = True
+                        self.direction = 'W'
+            elif self.direction == 'W':
+                if not self.passed_light:
+                    self.x -= self.speed
+                else:
+                    # Skręt w prawo: jedziemy na północ
+                    if self.y > HEIGHT // 2 - 60:
+                        self.y -= self.speed
+                    else:
+                        self.has_turned = True
+                        self.direction = 'N'
+        else:
+            # --- JAZDA PROSTO (lub po ukończeniu skrętu) ---
+            if self.direction == 'N':
+                self.y -= self.speed
+            elif self.direction == 'S':
+                self.y += self.speed
+            elif self.direction == 'E':
+                self.x += self.speed
+            elif self.direction == 'W':
+                self.x -= self.speed
+        return True
+
+    def draw(self, win, cache):
+        import pygame
+        rect = pygame.draw.rect(win, BLUE, (self.x, self.y, CAR_SIZE, CAR_SIZE))
+        text = cache.label(('car', self.id), str(self.id), WHITE)
+        return rect.union(win.blit(text, (self.x, self.y)))
+
+
+class Pedestrian:
+    pedestrian_id_counter = 0
+
+    def __init__(self, crossing):
+        self.crossing = crossing
+        self.speed = 1
+        self.passed_light = False
+        self.id = Pedestrian.pedestrian_id_counter
+        Pedestrian.pedestrian_id_counter += 1
+
+        if crossing == 'NS':
+            self.x = WIDTH // 2 - 70
+            self.y = HEIGHT // 2 + 80
+        elif crossing == 'SN':
+            self.x = WIDTH // 2 + 70
+            self.y = HEIGHT // 2 - 80
+        elif crossing == 'EW':
+            self.x = WIDTH // 2 - 80
+            self.y = HEIGHT // 2 - 70
+        elif crossing == 'WE':
+            self.x = WIDTH // 2 + 80
+            self.y = HEIGHT // 2 + 70
+
+    def move(self, light):
+        # Zwraca False, gdy pieszy czeka na czerwonym
+        if self.passed_light:
+            dx, dy = 0, 0
+            if self.crossing == 'NS':
+                dy = -self.speed
+            elif self.crossing == 'SN':
+                dy = self.speed
+            elif self.crossing == 'EW':
+                dx = self.speed
+            elif self.crossing == 'WE':
+                dx = -self.speed
+            self.x += dx
+            self.y += dy
+            return True
+        else:
+            if light.pedestrian_green(self.crossing):
+                dx, dy = 0, 0
+                if self.crossing == 'NS':
+                    dy = -self.speed
+                elif self.crossing == 'SN':
+                    dy = self.speed
+                elif self.crossing == 'EW':
+                    dx = self.speed
+                elif self.crossing == 'WE':
+                    dx = -self.speed
+                self.x += dx
+                self.y += dy
+
+                if (
+                    (self.crossing == 'NS' and self.y <= HEIGHT // 2 + 40) or
+                    (self.crossing == 'SN' and self.y >= HEIGHT // 2 - 40) or
+                    (self.crossing == 'EW' and self.x >= WIDTH // 2 - 40) or
+                    (self.crossing == 'WE' and self.x <= WIDTH // 2 + 40)
+                ):
+                    self.passed_light = True
+                return True
+        return False
+
+    def draw(self, win, cache):
+        import pygame
+        rect = pygame.draw.circle(win, YELLOW, (int(self.x), int(self.y)), PEDESTRIAN_SIZE)
+        text = cache.label(('ped', self.id), str(self.id), BLACK)
+        return rect.union(win.blit(text, (self.x - 5, self.y - 5)))
+
+
+def detect_pedestrian_collisions(pedestrians, hit):
+    # hit[k] - czy pieszy k jest w zasięgu któregoś pojazdu (z maski bliskości)
+    collisions = []
+    remaining_pedestrians = []
+    for ped, collision_occurred in zip(pedestrians, hit):
+        if collision_occurred:
+            collisions.append((ped.x, ped.y))
+        else:
+            remaining_pedestrians.append(ped)
+    return collisions, remaining_pedestrians
+
+
+def detect_car_collisions(cars, active_pairs):
+    new_collisions = 0
+    current_pairs = set()
+
+    # Siatka o boku CAR_SIZE: kolidujące pojazdy leżą w tej samej lub sąsiedniej komórce.
+    # Środki przesunięte są o tyle samo, więc porównujemy narożniki (x, y) bez pierwiastka.
+    for car1, car2 in close_pairs(cars, CAR_SIZE, CAR_SIZE ** 2):
+        # kolizja, gdy prostokąty zachodzą na siebie
+        pair = (car1.id, car2.id) if car1.id < car2.id else (car2.id, car1.id)
+        current_pairs.add(pair)
+        if pair not in active_pairs:
+            new_collisions += 1
+
+    return new_collisions, current_pairs
+
+
+def draw_background():
+    import pygame
+    # Statyczna część planszy (jezdnie i przejścia) rysowana raz
+    win = pygame.Surface((WIDTH, HEIGHT))
+    if pygame.display.get_surface() is not None:
+        win = win.convert()
+    win.fill(GRAY)
+    pygame.draw.rect(win, BLACK, (WIDTH // 2 - 40, 0, 80, HEIGHT))
+    pygame.draw.rect(win, BLACK, (0, HEIGHT // 2 - 40, WIDTH, 80))
+
+    pygame.draw.rect(win, WHITE, (WIDTH // 2 - 90, HEIGHT // 2 - 45, 20, 90))
+    pygame.draw.rect(win, WHITE, (WIDTH // 2 + 70, HEIGHT // 2 - 45, 20, 90))
+    pygame.draw.rect(win, WHITE, (WIDTH // 2 - 45, HEIGHT // 2 - 90, 90, 20))
+    pygame.draw.rect(win, WHITE, (WIDTH // 2 - 45, HEIGHT // 2 + 70, 90, 20))
+    return win
+
+
+def draw_intersection(win, cache, light, cars, pedestrians, ped_collisions, car_collisions, elapsed_seconds,
+                      hud=()):
+    # hud - dodatkowe wiersze w prawym górnym rogu (np. czasy etapów z profilera)
+    import pygame
+    if cache.background is None:
+        cache.background = draw_background()
+    cache.begin_frame(win)
+    # Światła zmieniają się rzadko, ale obszar wokół skrzyżowania i tak jest odświeżany
+    dirty = [pygame.Rect(LIGHTS_AREA)]
+
+    # --- ŚWIATŁA DLA POJAZDÓW ---
+    if light.buffer_active:
+        # W czasie bufora wszystkie światła czerwone
+        pygame.draw.circle(win, RED, (WIDTH // 2 - 15, HEIGHT // 2 + 30), 10)
+        pygame.draw.circle(win, RED, (WIDTH // 2 + 15, HEIGHT // 2 - 30), 10)
+        pygame.draw.circle(win, RED, (WIDTH // 2 + 30, HEIGHT // 2 + 15), 10)
+        pygame.draw.circle(win, RED, (WIDTH // 2 - 30, HEIGHT // 2 - 15), 10)
+    else:
+        if light.state == 'NS':
+            pygame.draw.circle(win, GREEN, (WIDTH // 2 - 15, HEIGHT // 2 + 30), 10)
+            pygame.draw.circle(win, GREEN, (WIDTH // 2 + 15, HEIGHT // 2 - 30), 10)
+            pygame.draw.circle(win, RED,   (WIDTH // 2 + 30, HEIGHT // 2 + 15), 10)
+            pygame.draw.circle(win, RED,   (WIDTH // 2 - 30, HEIGHT // 2 - 15), 10)
+        else:
+            pygame.draw.circle(win, RED,   (WIDTH // 2 - 15, HEIGHT // 2 + 30), 10)
+            pygame.draw.circle(win, RED,   (WIDTH // 2 + 15, HEIGHT // 2 - 30), 10)
+            pygame.draw.circle(win, GREEN, (WIDTH // 2 + 30, HEIGHT // 2 + 15), 10)
+            pygame.draw.circle(win, GREEN, (WIDTH // 2 - 30, HEIGHT // 2 - 15), 10)
+
+    # --- ŚWIATŁA DLA PIESZYCH ---
+    if light.buffer_active:
+        # W czasie bufora każdy znak dla pieszych czerwony
+        pygame.draw.rect(win, RED, (WIDTH // 2 - 60, HEIGHT // 2 + 50, 20, 20))
+        pygame.draw.rect(win, RED, (WIDTH // 2 + 50, HEIGHT // 2 - 60, 20, 20))
+        pygame.draw.rect(win, RED, (WIDTH // 2 - 60, HEIGHT // 2 - 60, 20, 20))
+        pygame.draw.rect(win, RED, (WIDTH // 2 + 50, HEIGHT // 2 + 50, 20, 20))
+    else:
+        if light.pedestrian_state == 'NS':
+            pygame.draw.rect(win, GREEN, (WIDTH // 2 - 60, HEIGHT // 2 + 50, 20, 20))
+            pygame.draw.rect(win, GREEN, (WIDTH // 2 + 50, HEIGHT // 2 - 60, 20, 20))
+            pygame.draw.rect(win, RED,   (WIDTH // 2 - 60, HEIGHT // 2 - 60, 20, 20))
+            pygame.draw.rect(win, RED,   (WIDTH // 2 + 50, HEIGHT // 2 + 50, 20, 20))
+        else:
+            pygame.draw.rect(win, RED,   (WIDTH // 2 - 60, HEIGHT // 2 + 50, 20, 20))
+            pygame.draw.rect(win, RED,   (WIDTH // 2 + 50, HEIGHT // 2 - 60, 20, 20))
+            pygame.draw.rect(win, GREEN, (WIDTH // 2 - 60, HEIGHT // 2 - 60, 20, 20))
+            pygame.draw.rect(win, GREEN, (WIDTH // 2 + 50, HEIGHT // 2 + 50, 20, 20))
+
+    # Rysowanie pojazdów i pieszych
+    for car in cars:
+        dirty.append(car.draw(win, cache))
+    for ped in pedestrians:
+        dirty.append(ped.draw(win, cache))
+
+    # Wyświetlanie liczników kolizji i czasu
+    text_ped = cache.text('ped', f"Kolizje pieszych: {ped_collisions}", BLACK)
+    text_car = cache.text('car', f"Kolizje pojazdów: {car_collisions}", BLACK)
+    text_time = cache.text('time', f"Czas: {elapsed_seconds} s", BLACK)
+    dirty.append(win.blit(text_ped, (10, 10)))
+    dirty.append(win.blit(text_car, (10, 50)))
+    dirty.append(win.blit(text_time, (10, 90)))
+    for i, line in enumerate(hud):
+        text = cache.text(('hud', i), line, BLACK, size=20)
+        dirty.append(win.blit(text, (WIDTH - 10 - text.get_width(), 10 + 18 * i)))
+
+    cache.end_frame(dirty)
+
+
+# Pola pojazdów i pieszych zapisywane w migawce stanu
+CAR_FIELDS = ('id', 'direction', 'x', 'y', 'speed', 'passed_light', 'turn_right', 'has_turned')
+PEDESTRIAN_FIELDS = ('id', 'crossing', 'x', 'y', 'speed', 'passed_light')
+
+
+class Simulation:
+    def __init__(self, seed=None, duration=SIM_SECONDS, car_arrivals=None, ped_arrivals=None,
+                 variant=DEFAULT_VARIANT, profiler=None):
+        # Każda symulacja ma własny generator - przebieg da się odtworzyć z ziarna
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 53)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # Wszystkie przyjazdy losowane z góry; pętla sprawdza tylko kursor harmonogramu
+        self.arrivals = build_schedule(
+            self.rng, duration * FPS, FPS,
+            car_arrivals or FixedHeadway(CAR_SPAWN_INTERVAL),
+            ped_arrivals or FixedHeadway(PED_SPAWN_INTERVAL),
+            TURN_RIGHT_PROBABILITY,
+        )
+        self.variant = variant
+        self.light = variant.light()
+        self.cars = []
+        self.lanes = LaneIndex(tolerance=5)
+        self.pedestrians = []
+        self.ped_collision_count = 0
+        self.car_collision_count = 0
+        self.active_car_pairs = set()
+        # Maska bliskości pojazd x pieszy z detekcji kolizji - aktualna na początku
+        # następnego taktu, o ile nikt nowy się nie pojawił
+        self.pedestrian_near = None
+        # Czas symulacji liczony w klatkach (niezależny od zegara ściennego)
+        self.tick = 0
+        # Pomiar czasu etapów taktu (profiler.PhaseProfiler); None - wyłączony
+        self.profiler = profiler
+        # Czy w ostatnim takcie nic się nie ruszyło (zob. skip_idle)
+        self.idle = False
+
+    @property
+    def elapsed_seconds(self):
+        return self.tick // FPS
+
+    def step(self):
+        profiler = self.profiler
+        if profiler:
+            profiler.begin()
+        self.light.update()
+        self.tick += 1
+        if profiler:
+            profiler.lap('light')
+
+        # Pojawianie się pojazdów i pieszych według harmonogramu
+        arrivals = self.arrivals
+        due = arrivals.due(self.tick)
+        for i in due:
+            if arrivals.kinds[i] == CAR:
+                car = Car(DIRECTIONS[arrivals.codes[i]], bool(arrivals.turns[i]), self.variant.pass_margin)
+                self.cars.append(car)
+                self.lanes.add(car)
+            else:
+                self.pedestrians.append(Pedestrian(CROSSINGS[arrivals.codes[i]]))
+        if profiler:
+            profiler.lap('spawn')
+
+        # Ruch pojazdów
+        if due or self.pedestrian_near is None:
+            self.pedestrian_near = self.pedestrian_proximity()
+        idle = not due
+        for car, near in zip(self.cars, self.pedestrian_near.any(axis=1).tolist()):
+            if car.move(self.light, self.lanes, near):
+                idle = False
+            self.lanes.update(car)
+        if profiler:
+            profiler.lap('cars')
+
+        # Ruch pieszych
+        for ped in self.pedestrians:
+            if ped.move(self.light):
+                idle = False
+        self.idle = idle
+        if profiler:
+            profiler.lap('pedestrians')
+
+        # Detekcja kolizji pieszych
+        near = self.pedestrian_proximity()
+        hit = near.any(axis=0)
+        ped_collisions, self.pedestrians = detect_pedestrian_collisions(self.pedestrians, hit.tolist())
+        self.ped_collision_count += len(ped_collisions)
+        near = near[:, ~hit]
+        if profiler:
+            profiler.lap('ped_collisions')
+
+        # Detekcja kolizji pojazdów
+        new_car_hits, current_pairs = detect_car_collisions(self.cars, self.active_car_pairs)
+        self.car_collision_count += new_car_hits
+        self.active_car_pairs = current_pairs
+        if profiler:
+            profiler.lap('car_collisions')
+
+        # Usuwanie obiektów poza ekranem
+        keep_cars = [0 <= car.x <= WIDTH and 0 <= car.y <= HEIGHT for car in self.cars]
+        keep_peds = [0 <= ped.x <= WIDTH and 0 <= ped.y <= HEIGHT for ped in self.pedestrians]
+        for car, keep in zip(self.cars, keep_cars):
+            if not keep:
+                self.lanes.remove(car)
+        self.cars = [car for car, keep in zip(self.cars, keep_cars) if keep]
+        self.pedestrians = [ped for ped, keep in zip(self.pedestrians, keep_peds) if keep]
+        # Maska z detekcji kolizji posłuży do decyzji o zatrzymaniu w następnym takcie
+        self.pedestrian_near = near[np.array(keep_cars, dtype=bool)][:, np.array(keep_peds, dtype=bool)]
+        if profiler:
+            profiler.lap('despawn')
+
+    def pedestrian_proximity(self):
+        return pedestrian_proximity(positions(self.cars), positions(self.pedestrians),
+                                    CAR_SIZE, PEDESTRIAN_SIZE)
+
+    def skip_idle(self, end_tick):
+        # Po takcie, w którym nikt się nie pojawił ani nie ruszył (pusto albo wszyscy czekają),
+        # kolejne takty do najbliższego przyjazdu lub zmiany świateł też niczego nie zmienią -
+        # przesuwamy od razu zegar i sterownik. Zwraca liczbę pominiętych taktów.
+        if not self.idle:
+            return 0
+        n = min(self.arrivals.next_tick - self.tick - 1, self.light.idle_ticks(), end_tick - self.tick)
+        if n <= 0:
+            return 0
+        self.light.advance(n)
+        self.tick += n
+        return n
+
+    def snapshot(self):
+        # Pełny stan symulacji z prostych wartości (do pickle); restore() wznawia przebieg
+        # dokładnie od tego miejsca
+        arrivals = self.arrivals
+        return {
+            'seed': self.seed,
+            'variant': self.variant.name,
+            'tick': self.tick,
+            'rng': self.rng.bit_generator.state,
+            'arrivals': (arrivals.ticks, arrivals.kinds, arrivals.codes, arrivals.turns, arrivals.cursor),
+            'light_class': type(self.light).__name__,
+            'light': dict(vars(self.light)),
+            'cars': [tuple(getattr(car, name) for name in CAR_FIELDS) for car in self.cars],
+            'pedestrians': [tuple(getattr(ped, name) for name in PEDESTRIAN_FIELDS) for ped in self.pedestrians],
+            'car_id_counter': Car.car_id_counter,
+            'pedestrian_id_counter': Pedestrian.pedestrian_id_counter,
+            'ped_collision_count': self.ped_collision_count,
+            'car_collision_count': self.car_collision_count,
+            'active_car_pairs': sorted(self.active_car_pairs),
+            'pedestrian_near': self.pedestrian_near,
+        }
+
+    @classmethod
+    def restore(cls, state, variant=None):
+        # variant - inny wariant niż w migawce (rozgałęzienie scenariusza ze wspólnego stanu)
+        variant = variant or VARIANTS[state['variant']]
+        sim = cls(state['seed'], 0, variant=variant)
+        sim.tick = state['tick']
+        sim.rng.bit_generator.state = state['rng']
+        *schedule, cursor = state['arrivals']
+        sim.arrivals = ArrivalSchedule(*schedule)
+        sim.arrivals.seek(cursor)
+
+        saved = state['light']
+        if type(sim.light).__name__ != state['light_class']:
+            # Inny sterownik: przenosimy tylko fazę i licznik cyklu
+            saved = {name: saved[name] for name in ('timer', 'state', 'pedestrian_state')}
+        vars(sim.light).update(saved)
+
+        for values in state['cars']:
+            car = Car(values[1], pass_margin=variant.pass_margin)
+            for name, value in zip(CAR_FIELDS, values):
+                setattr(car, name, value)
+            sim.cars.append(car)
+            sim.lanes.add(car)
+        for values in state['pedestrians']:
+            ped = Pedestrian(values[1])
+            for name, value in zip(PEDESTRIAN_FIELDS, values):
+                setattr(ped, name, value)
+            sim.pedestrians.append(ped)
+        # Liczniki identyfikatorów są wspólne dla procesu - tylko w górę
+        Car.car_id_counter = max(Car.car_id_counter, state['car_id_counter'])
+        Pedestrian.pedestrian_id_counter = max(Pedestrian.pedestrian_id_counter, state['pedestrian_id_counter'])
+
+        sim.ped_collision_count = state['ped_collision_count']
+        sim.car_collision_count = state['car_collision_count']
+        sim.active_car_pairs = set(state['active_car_pairs'])
+        near = state['pedestrian_near']
+        sim.pedestrian_near = None if near is None else near.copy()
+        return sim
+
+    def reseed(self, seed, duration, car_arrivals=None, ped_arrivals=None):
+        # Nowy generator i nowe przyjazdy na kolejne duration sekund (od bieżącego taktu)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.arrivals = build_schedule(
+            self.rng, duration * FPS, FPS,
+            car_arrivals or FixedHeadway(CAR_SPAWN_INTERVAL),
+            ped_arrivals or FixedHeadway(PED_SPAWN_INTERVAL),
+            TURN_RIGHT_PROBABILITY, start_tick=self.tick,
+        )
+
+
+def save_snapshot(sim, path):
+    with open(path, 'wb') as f:
+        pickle.dump(sim.snapshot(), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def make_arrivals(kind):
+    # Przyjazdy co stały odstęp albo proces Poissona o tej samej średniej intensywności
+    if kind == 'poisson':
+        return Poisson(1000 / CAR_SPAWN_INTERVAL), Poisson(1000 / PED_SPAWN_INTERVAL)
+    return FixedHeadway(CAR_SPAWN_INTERVAL), FixedHeadway(PED_SPAWN_INTERVAL)
+
+
+def run_headless(duration=SIM_SECONDS, seed=None, arrivals='fixed', variant=DEFAULT_VARIANT, record=None,
+                 profiler=None):
+    # Bez okna i bez ograniczenia FPS - symulacja tak szybko, jak pozwala procesor
+    sim = Simulation(seed, duration, *make_arrivals(arrivals), variant, profiler)
+    return run_steps(sim, duration, record)
+
+
+def run_steps(sim, duration, record=None):
+    # record - plik zapisu trajektorii (trajectory.py), odtwarzanego bez ponownego liczenia.
+    # Bez zapisu okresy bez ruchu są przeskakiwane (skip_idle) - wynik jest ten sam.
+    if record is None:
+        end = sim.tick + duration * FPS
+        while sim.tick < end:
+            sim.step()
+            sim.skip_idle(end)
+        return sim
+    from trajectory import TrajectoryRecorder
+
+    with TrajectoryRecorder(record, duration * FPS, start_tick=sim.tick) as recorder:
+        for _ in range(duration * FPS):
+            sim.step()
+            recorder.record(sim)
+    return sim
+
+
+def warm_up(duration, seed=None, arrivals='fixed', variant=DEFAULT_VARIANT):
+    # Rozbieg do stanu ustalonego; zwraca migawkę do rozgałęziania przebiegów
+    return run_headless(duration, seed, arrivals, variant).snapshot()
+
+
+def run_from_snapshot(state, duration=SIM_SECONDS, seed=None, arrivals='fixed', variant=None, record=None,
+                      profiler=None):
+    # Przebieg startujący z migawki: własne ziarno i przyjazdy, kolizje liczone od zera
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 53)
+    sim = Simulation.restore(state, variant)
+    sim.reseed(seed, duration, *make_arrivals(arrivals))
+    sim.ped_collision_count = 0
+    sim.car_collision_count = 0
+    sim.profiler = profiler
+    return run_steps(sim, duration, record)
+
+
+def run_visual(duration=SIM_SECONDS, seed=None, arrivals='fixed', speed='1', variant=DEFAULT_VARIANT,
+               profiler=None):
+    import pygame
+    from render_cache import RenderCache
+
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    cache = RenderCache()
+    sim = Simulation(seed, duration, *make_arrivals(arrivals), variant, profiler)
+    total_ticks = duration * FPS
+    keys = dict(zip((pygame.K_1, pygame.K_2, pygame.K_3), SPEEDS))
+    owed = 0.0   # takty fizyki należne od ostatniej klatki
+
+    # Stały krok fizyki, niezależny od rysowania: w każdej klatce wykonujemy tyle taktów,
+    # ile wynika z upływu czasu i mnożnika. Gdy rysowanie nie nadąża, pomijamy klatki,
+    # a nie spowalniamy symulacji.
+    pygame.display.set_caption(f"Symulacja ruchu drogowego (x{speed})")
+    while sim.tick < total_ticks:
+        multiplier = SPEEDS[speed]
+        frame_ms = clock.tick(FPS if multiplier is not None else 0)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return None
+            if event.type == pygame.KEYDOWN and event.key in keys:
+                speed = keys[event.key]
+                pygame.display.set_caption(f"Symulacja ruchu drogowego (x{speed})")
+
+        if multiplier is None:
+            # Tryb max: liczymy przez czas jednej klatki, potem rysujemy
+            deadline = time.perf_counter() + 1 / FPS
+            while sim.tick < total_ticks and time.perf_counter() < deadline:
+                sim.step()
+        else:
+            # Najwyżej sekunda symulacji na klatkę, żeby nie nadrabiać w nieskończoność
+            owed = min(owed + frame_ms * FPS / 1000 * multiplier, multiplier * FPS)
+            n = int(owed)
+            owed -= n
+            for _ in range(min(n, total_ticks - sim.tick)):
+                sim.step()
+
+        if profiler:
+            profiler.begin()
+        draw_intersection(win, cache, sim.light, sim.cars, sim.pedestrians,
+                          sim.ped_collision_count, sim.car_collision_count, sim.elapsed_seconds,
+                          profiler.hud_lines(FPS) if profiler else ())
+        if profiler:
+            profiler.lap('draw')
+
+    return sim
+
+
+def main(variant=None):
+    # Bez podanego wariantu (python intersection.py) wybiera się go opcją --variant
+    parser = argparse.ArgumentParser(description="Symulacja ruchu na skrzyżowaniu")
+    if variant is None:
+        parser.add_argument("--variant", choices=list(VARIANTS), default=DEFAULT_VARIANT.name,
+                            help="wariant skrzyżowania (sterownik sygnalizacji i progi)")
+    parser.add_argument("--headless", action="store_true",
+                        help="symulacja bez okna i bez ograniczenia FPS")
+    parser.add_argument("--duration", "-d", type=int, default=SIM_SECONDS,
+                        help="czas symulacji w sekundach")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="ziarno generatora losowego (domyślnie losowe)")
+    parser.add_argument("--arrivals", choices=["fixed", "poisson"], default="fixed",
+                        help="przyjazdy co stały odstęp albo proces Poissona")
+    parser.add_argument("--speed", choices=list(SPEEDS), default="1",
+                        help="mnożnik prędkości w trybie z oknem (w trakcie: klawisze 1, 2, 3)")
+    parser.add_argument("--from-snapshot", default=None,
+                        help="start z migawki stanu zapisanej przez --save-snapshot (tylko --headless)")
+    parser.add_argument("--save-snapshot", default=None,
+                        help="zapisz migawkę stanu po zakończeniu symulacji (tylko --headless)")
+    parser.add_argument("--record", default=None,
+                        help="zapisz trajektorię do pliku (odtwarzanie: python trajectory.py PLIK; tylko --headless)")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="PLIK",
+                        help="mierz czas etapów taktu (raport po symulacji, w oknie na planszy); "
+                             "z PLIKIEM także percentyle i histogramy w JSON")
+    args = parser.parse_args()
+    if variant is None:
+        variant = VARIANTS[args.variant]
+    profiler = None
+    if args.profile is not None:
+        from profiler import PhaseProfiler
+        profiler = PhaseProfiler()
+
+    if args.headless:
+        if args.from_snapshot:
+            sim = run_from_snapshot(load_snapshot(args.from_snapshot), args.duration, args.seed,
+                                    args.arrivals, variant, args.record, profiler)
+        else:
+            sim = run_headless(args.duration, args.seed, args.arrivals, variant, args.record, profiler)
+        if args.save_snapshot:
+            save_snapshot(sim, args.save_snapshot)
+    else:
+        import pygame
+        sim = run_visual(args.duration, args.seed, args.arrivals, args.speed, variant, profiler)
+        pygame.quit()
+
+    if sim is not None:
+        print(f"Symulacja zakończona po {args.duration} s.")
+        print(f"Liczba kolizji pieszych: {sim.ped_collision_count}")
+        print(f"Liczba kolizji pojazdów: {sim.car_collision_count}")
+        print(f"Ziarno: {sim.seed}")
+    if profiler:
+        print()
+        print(profiler.report())
+        if args.profile:
+            profiler.save(args.profile)
+            print(f"Pomiary etapów zapisane w pliku: {args.profile}")
+
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
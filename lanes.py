@@ -0,0 +1,114 @@
+# Uporządkowane kolejki pojazdów na pasach. Pas to para (kierunek, położenie
+# poprzeczne); pojazdy na pasie tworzą listę dwukierunkową od czoła do końca,
+# więc poprzednik pojazdu jest dostępny w O(1).
+
+def progress(car):
+    # Postęp wzdłuż kierunku jazdy (rośnie w stronę, w którą jedzie pojazd)
+    d = car.direction
+    if d == 'N':
+        return -car.y
+    if d == 'S':
+        return car.y
+    if d == 'E':
+        return car.x
+    return -car.x
+
+
+def lateral(car):
+    return car.x if car.direction in ('N', 'S') else car.y
+
+
+class Lane:
+    __slots__ = ('head', 'tail')
+
+    def __init__(self):
+        self.head = None   # pojazd na czele
+        self.tail = None   # ostatni pojazd
+
+
+class LaneIndex:
+    def __init__(self, tolerance):
+        # Pojazdy, których położenie poprzeczne różni się o mniej niż tolerance,
+        # jadą tym samym pasem (jak warunek abs(self.x - other.x) < 5 w Car.move)
+        self.tolerance = tolerance
+        self.lanes = {'N': {}, 'S': {}, 'E': {}, 'W': {}}
+
+    def add(self, car):
+        key = lateral(car)
+        lanes = self.lanes[car.direction]
+        lane = lanes.get(key)
+        if lane is None:
+            lane = lanes[key] = Lane()
+        car.lane = lane
+        car.lane_key = (car.direction, key)
+        # Szukamy miejsca od końca pasa - nowe pojazdy zwykle dołączają na końcu
+        p = progress(car)
+        ahead = lane.tail
+        while ahead is not None and progress(ahead) < p:
+            ahead = ahead.lane_ahead
+        self._link(lane, car, ahead)
+
+    def remove(self, car):
+        lane = car.lane
+        self._unlink(lane, car)
+        if lane.head is None:
+            direction, key = car.lane_key
+            del self.lanes[direction][key]
+        car.lane = None
+
+    def update(self, car):
+        # Wywoływane po ruchu pojazdu: zmiana pasa przy skręcie albo przesunięcie w kolejce
+        if car.lane_key != (car.direction, lateral(car)):
+            self.remove(car)
+            self.add(car)
+            return
+        p = progress(car)
+        ahead = car.lane_ahead
+        if ahead is not None and progress(ahead) < p:
+            lane = car.lane
+            self._unlink(lane, car)
+            while ahead is not None and progress(ahead) < p:
+                ahead = ahead.lane_ahead
+            self._link(lane, car, ahead)
+
+    def blocked(self, car, max_gap):
+        # Czy przed pojazdem, na tym samym pasie, jest inny pojazd bliżej niż max_gap
+        p = progress(car)
+        lat = lateral(car)
+        for key, lane in self.lanes[car.direction].items():
+            if abs(key - lat) >= self.tolerance:
+                continue
+            other = car.lane_ahead if lane is car.lane else lane.tail
+            while other is not None and progress(other) <= p:
+                other = other.lane_ahead
+            if other is not None and progress(other) - p < max_gap:
+                return True
+        return False
+
+    @staticmethod
+    def _link(lane, car, ahead):
+        # Wstawia car bezpośrednio za pojazdem ahead (None - na czoło pasa)
+        behind = lane.head if ahead is None else ahead.lane_behind
+        car.lane_ahead = ahead
+        car.lane_behind = behind
+        if ahead is None:
+            lane.head = car
+        else:
+            ahead.lane_behind = car
+        if behind is None:
+            lane.tail = car
+        else:
+            behind.lane_ahead = car
+
+    @staticmethod
+    def _unlink(lane, car):
+        ahead, behind = car.lane_ahead, car.lane_behind
+        if ahead is None:
+            lane.head = behind
+        else:
+            ahead.lane_behind = behind
+        if behind is None:
+            lane.tail = ahead
+        else:
+            behind.lane_ahead = ahead
+        car.lane_ahead = car.lane_behind = None
@@ -0,0 +1,472 @@
+import argparse
+import random
+
+import numpy as np
+
+from arrivals import CAR, CROSSINGS, DIRECTIONS, ArrivalSchedule, build_schedule
+from intersection import (CAR_SIZE, CAR_SPAWN_INTERVAL, DEFAULT_VARIANT, FPS, HEIGHT, PED_SPAWN_INTERVAL,
+                          PEDESTRIAN_SIZE, SIM_SECONDS, TURN_RIGHT_PROBABILITY, VARIANTS, WIDTH,
+                          FixedHeadway, Simulation, make_arrivals, run_steps)
+
+# Silnik "struktura tablic": wszystkie pojazdy i piesi trzymani w tablicach NumPy,
+# a logika Car.move / Pedestrian.move z intersection.py liczona maskami dla
+# całej floty naraz. Wyniki są takie same jak w silniku obiektowym (dla każdego wariantu).
+
+# Kody kierunków jak w arrivals.DIRECTIONS: N, S, E, W
+AXIS = np.array([1, 1, 0, 0])          # oś ruchu: 0 - x, 1 - y
+SIGN = np.array([-1, 1, 1, -1])        # zwrot ruchu wzdłuż osi
+RIGHT = np.array([2, 3, 1, 0])         # kierunek po skręcie w prawo: N->E, S->W, E->S, W->N
+FRONT = np.where(SIGN > 0, CAR_SIZE, 0)  # przód pojazdu względem (x, y)
+
+CENTER = np.array([WIDTH // 2, HEIGHT // 2])
+LIGHT_OFFSET = 100      # odległość linii zatrzymania od skrzyżowania
+TURN_DEPTH = 60         # jak głęboko w skrzyżowanie wjeżdża pojazd skręcający w prawo
+FOLLOW_GAP = CAR_SIZE + 5
+LANE_TOLERANCE = 5
+
+# Progi w układzie "postępu" p = SIGN * współrzędna + FRONT (rośnie w kierunku jazdy)
+LIGHT_THRESHOLD = SIGN * CENTER[AXIS] - (10 + LIGHT_OFFSET)
+TURN_THRESHOLD = SIGN[RIGHT] * CENTER[AXIS[RIGHT]] + TURN_DEPTH
+
+# Piesi: kody przejść jak w arrivals.CROSSINGS: NS, SN, EW, WE
+PED_STEP = np.array([[0, -1], [0, 1], [1, 0], [-1, 0]])
+PED_AXIS = np.array([1, 1, 0, 0])
+PED_SIGN = np.array([-1, 1, 1, -1])
+PED_PASS_THRESHOLD = PED_SIGN * CENTER[PED_AXIS] - 40
+PED_GROUP = np.array([0, 0, 1, 1])     # 0 - przejścia NS/SN, 1 - EW/WE
+
+CAR_HIT_DISTANCE_SQ = CAR_SIZE ** 2
+# Przesunięcia sąsiedztwa 3x3 w siatce (grid_pairs)
+NEIGHBOURHOOD = np.array([(ox, oy) for ox in (-1, 0, 1) for oy in (-1, 0, 1)])
+
+
+def pass_threshold(variant):
+    # Próg minięcia sygnalizatora (Variant.pass_margin) w układzie postępu
+    return SIGN * CENTER[AXIS] - variant.pass_margin
+
+
+def expand_ranges(lo, hi):
+    # Przedziały [lo, hi) rozwinięte w pary (numer przedziału, indeks z przedziału)
+    counts = hi - lo
+    owner = np.repeat(np.arange(len(lo)), counts)
+    return owner, np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(len(owner))
+
+
+def grid_pairs(group_a, xy_a, group_b, xy_b, cell):
+    # Pary (a, b) z tej samej grupy (repliki; 0 - jedna symulacja) leżące w tej samej albo
+    # sąsiedniej komórce siatki o boku cell - nadzbiór par bliższych niż cell w obu osiach.
+    # Klucze komórek b sortujemy raz, a każde a szuka binarnie swoich 9 komórek.
+    if not len(xy_a) or not len(xy_b):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cells_a = np.floor(xy_a / cell).astype(np.int64)
+    cells_b = np.floor(xy_b / cell).astype(np.int64)
+    # Ramka pustych komórek wokół zajętych - sąsiedztwo nie przechodzi do innego wiersza ani grupy
+    low = np.minimum(cells_a.min(axis=0), cells_b.min(axis=0)) - 1
+    cells_a -= low
+    cells_b -= low
+    size = np.maximum(cells_a.max(axis=0), cells_b.max(axis=0)) + 2
+    key_a = (group_a * size[0] + cells_a[:, 0]) * size[1] + cells_a[:, 1]
+    key_b = (group_b * size[0] + cells_b[:, 0]) * size[1] + cells_b[:, 1]
+    order = np.argsort(key_b, kind='stable')
+    sorted_b = key_b[order]
+    queries = (key_a[None, :] + (NEIGHBOURHOOD @ [size[1], 1])[:, None]).ravel()
+    query, found = expand_ranges(np.searchsorted(sorted_b, queries, side='left'),
+                                 np.searchsorted(sorted_b, queries, side='right'))
+    return query % len(xy_a), order[found]
+
+
+def blocked(own_pos, own_dir, other_pos, other_dir):
+    # Warunek z Car.move: pojazd z przodu w tym samym kierunku i na tym samym pasie
+    axis = AXIS[own_dir]
+    rows = np.arange(len(own_dir))
+    gap = SIGN[own_dir] * (other_pos[rows, axis] - own_pos[rows, axis])
+    lateral = np.abs(other_pos[rows, 1 - axis] - own_pos[rows, 1 - axis])
+    return (other_dir == own_dir) & (gap > 0) & (gap < FOLLOW_GAP) & (lateral < LANE_TOLERANCE)
+
+
+def follow_pairs(group, pos, d, new_pos, new_dir, movable):
+    # Pary (i, j), i != j, w których j przed ruchem (albo po nim, gdy j może ruszyć) może
+    # blokować i: ta sama grupa i kierunek, położenie poprzeczne w sąsiednim przedziale
+    # szerokości LANE_TOLERANCE i postęp w (p_i, p_i + FOLLOW_GAP) z zapasem na zaokrąglenia.
+    # Stany j sortujemy po kluczu (grupa, kierunek, pas, postęp), więc poprzedników szuka
+    # się binarnie zamiast porównywać każdy pojazd z każdym. Para może wystąpić dwa razy.
+    n = len(d)
+    owner = np.concatenate([np.arange(n), np.flatnonzero(movable)])
+    entry_pos = np.concatenate([pos, new_pos[movable]])
+    entry_dir = np.concatenate([d, new_dir[movable]])
+    rows = np.arange(len(owner))
+    axis = AXIS[entry_dir]
+    progress = SIGN[entry_dir] * entry_pos[rows, axis]
+    lane = np.floor(entry_pos[rows, 1 - axis] / LANE_TOLERANCE).astype(np.int64)
+    lane -= lane.min() - 1
+    lanes = lane.max() + 2
+    bucket = (np.broadcast_to(group, n)[owner] * len(SIGN) + entry_dir) * lanes + lane
+    low = progress.min()
+    span = progress.max() - low + FOLLOW_GAP + 4
+    key = bucket * span + (progress - low)
+    order = np.argsort(key, kind='stable')
+    sorted_key = key[order]
+
+    # Pojazd i szuka w swoim przedziale pasa i w obu sąsiednich (stan i sprzed ruchu: pierwsze n)
+    start = (bucket[:n, None] + np.array([-1, 0, 1])).T * span + (progress[:n] - low)
+    query, found = expand_ranges(np.searchsorted(sorted_key, (start - 1).ravel(), side='right'),
+                                 np.searchsorted(sorted_key, (start + FOLLOW_GAP + 1).ravel(), side='left'))
+    i_idx = query % n
+    j_idx = owner[order[found]]
+    other = i_idx != j_idx
+    return i_idx[other], j_idx[other]
+
+
+def follow(group, pos, d, new_pos, new_dir, stop):
+    # Jazda za poprzedzającym pojazdem; zwraca maskę pojazdów, które ruszają.
+    # Car.move przetwarza pojazdy po kolei (tu: w kolejności tablic, w obrębie grupy):
+    # pojazd i widzi pojazdy wcześniejsze już po ich ruchu, a późniejsze jeszcze przed
+    # ruchem. Dla każdej pary, która może na siebie wpłynąć, liczymy wynik w obu wariantach
+    # (j ruszył / stoi). Rozstrzygania wymagają tylko pary, w których wynik zależy od
+    # decyzji wcześniejszego pojazdu - tych jest niewiele.
+    i_idx, j_idx = follow_pairs(group, pos, d, new_pos, new_dir, ~stop)
+    own_pos, own_dir = pos[i_idx], d[i_idx]
+    blocked_static = blocked(own_pos, own_dir, pos[j_idx], d[j_idx])
+    blocked_moved = blocked(own_pos, own_dir, new_pos[j_idx], new_dir[j_idx])
+    earlier = j_idx < i_idx
+    # Wynik pewny: j późniejszy, j na pewno stoi albo wynik nie zależy od ruchu j
+    certain = ~earlier | stop[j_idx] | (blocked_static == blocked_moved)
+    moving = ~stop
+    moving[i_idx[certain & blocked_static]] = False
+
+    pending = np.flatnonzero(~certain)
+    if len(pending):
+        pending = pending[np.argsort(i_idx[pending], kind='stable')]
+        for i, j, if_moved in zip(i_idx[pending].tolist(), j_idx[pending].tolist(),
+                                  blocked_moved[pending].tolist()):
+            # Pary posortowane po i, a j < i, więc decyzja j jest już ostateczna
+            if moving[i] and moving[j] == if_moved:
+                moving[i] = False
+    return moving
+
+
+def car_collision_pairs(group, pos, car_id):
+    # Posortowane pary zachodzących na siebie pojazdów zakodowane jako id_a << 32 | id_b
+    # (id_a < id_b) i indeks jednego z pojazdów każdej pary (np. do odczytania repliki)
+    a, b = grid_pairs(group, pos, group, pos, CAR_SIZE)
+    a, b = a[a < b], b[a < b]
+    dx = pos[a, 0] - pos[b, 0]
+    dy = pos[a, 1] - pos[b, 1]
+    close = dx * dx + dy * dy < CAR_HIT_DISTANCE_SQ
+    a, b = a[close], b[close]
+    pairs = (np.minimum(car_id[a], car_id[b]) << 32) | np.maximum(car_id[a], car_id[b])
+    order = np.argsort(pairs)
+    return pairs[order], a[order]
+
+
+def pedestrian_pairs(car_group, car_pos, ped_group, ped_pos):
+    # Pary (pojazd, pieszy) z warunku proximity.pedestrian_proximity, z siatki zamiast macierzy n x m
+    half = CAR_SIZE / 2
+    radius = half + PEDESTRIAN_SIZE
+    c, p = grid_pairs(car_group, car_pos + half, ped_group, ped_pos, radius)
+    dx = ped_pos[p, 0] - (car_pos[c, 0] + half)
+    dy = ped_pos[p, 1] - (car_pos[c, 1] + half)
+    near = dx * dx + dy * dy < radius ** 2
+    return c[near], p[near]
+
+
+def new_pairs(pairs, active):
+    # Maska par, których nie ma w posortowanej tablicy active (poprzedni takt)
+    found = np.searchsorted(active, pairs)
+    known = found < len(active)
+    known[known] = active[found[known]] == pairs[known]
+    return ~known
+
+# Współrzędne początkowe jak w Car.__init__ i Pedestrian.__init__ (wg kodu kierunku/przejścia)
+CAR_START = np.array([
+    [WIDTH // 2 + 10, HEIGHT],
+    [WIDTH // 2 - 30, -CAR_SIZE],
+    [-CAR_SIZE, HEIGHT // 2 + 10],
+    [WIDTH, HEIGHT // 2 - 30],
+], dtype=float)
+PED_START = np.array([
+    [WIDTH // 2 - 70, HEIGHT // 2 + 80],
+    [WIDTH // 2 + 70, HEIGHT // 2 - 80],
+    [WIDTH // 2 - 80, HEIGHT // 2 - 70],
+    [WIDTH // 2 + 80, HEIGHT // 2 + 70],
+], dtype=float)
+
+
+class NumpySimulation:
+    def __init__(self, seed=None, duration=SIM_SECONDS, car_arrivals=None, ped_arrivals=None,
+                 variant=DEFAULT_VARIANT):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 53)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.arrivals = build_schedule(
+            self.rng, duration * FPS, FPS,
+            car_arrivals or FixedHeadway(CAR_SPAWN_INTERVAL),
+            ped_arrivals or FixedHeadway(PED_SPAWN_INTERVAL),
+            TURN_RIGHT_PROBABILITY,
+        )
+        self.variant = variant
+        self.light = variant.light()
+        self.pass_threshold = pass_threshold(variant)
+        self.tick = 0
+        self.ped_collision_count = 0
+        self.car_collision_count = 0
+        self.next_car_id = 0
+        self.next_ped_id = 0
+
+        # Pojazdy (kolejność w tablicach = kolejność pojawiania się)
+        self.car_id = np.zeros(0, dtype=np.int64)
+        self.car_pos = np.zeros((0, 2))
+        self.car_dir = np.zeros(0, dtype=np.int64)
+        self.car_speed = np.zeros(0)
+        self.passed_light = np.zeros(0, dtype=bool)
+        self.turn_right = np.zeros(0, dtype=bool)
+        self.has_turned = np.zeros(0, dtype=bool)
+
+        # Piesi
+        self.ped_id = np.zeros(0, dtype=np.int64)
+        self.ped_pos = np.zeros((0, 2))
+        self.ped_crossing = np.zeros(0, dtype=np.int64)
+        self.ped_speed = np.zeros(0)
+        self.ped_passed = np.zeros(0, dtype=bool)
+
+        # Aktywne pary kolidujących pojazdów zakodowane jako id_a << 32 | id_b (posortowane)
+        self.active_car_pairs = np.zeros(0, dtype=np.int64)
+        # Czy przy pojeździe jest pieszy - z detekcji kolizji, ważne do następnego pojawienia się
+        self.pedestrian_near = None
+        self.idle = False
+
+    @classmethod
+    def restore(cls, state, variant=None):
+        # Wznowienie z migawki silnika obiektowego (Simulation.snapshot()), np. po rozbiegu
+        variant = variant or VARIANTS[state['variant']]
+        sim = cls(state['seed'], 0, variant=variant)
+        sim.tick = state['tick']
+        sim.rng.bit_generator.state = state['rng']
+        *schedule, cursor = state['arrivals']
+        sim.arrivals = ArrivalSchedule(*schedule)
+        sim.arrivals.seek(cursor)
+        saved = state['light']
+        if type(sim.light).__name__ != state['light_class']:
+            saved = {name: saved[name] for name in ('timer', 'state', 'pedestrian_state')}
+        vars(sim.light).update(saved)
+
+        # Krotki w kolejności intersection.CAR_FIELDS / PEDESTRIAN_FIELDS
+        cars, peds = state['cars'], state['pedestrians']
+        sim.car_id = np.array([car[0] for car in cars], dtype=np.int64)
+        sim.car_dir = np.array([DIRECTIONS.index(car[1]) for car in cars], dtype=np.int64)
+        sim.car_pos = np.array([car[2:4] for car in cars], dtype=float).reshape(-1, 2)
+        sim.car_speed = np.array([car[4] for car in cars], dtype=float)
+        sim.passed_light = np.array([car[5] for car in cars], dtype=bool)
+        sim.turn_right = np.array([car[6] for car in cars], dtype=bool)
+        sim.has_turned = np.array([car[7] for car in cars], dtype=bool)
+        sim.next_car_id = state['car_id_counter']
+        sim.ped_id = np.array([ped[0] for ped in peds], dtype=np.int64)
+        sim.ped_crossing = np.array([CROSSINGS.index(ped[1]) for ped in peds], dtype=np.int64)
+        sim.ped_pos = np.array([ped[2:4] for ped in peds], dtype=float).reshape(-1, 2)
+        sim.ped_speed = np.array([ped[4] for ped in peds], dtype=float)
+        sim.ped_passed = np.array([ped[5] for ped in peds], dtype=bool)
+        sim.next_ped_id = state['pedestrian_id_counter']
+
+        sim.ped_collision_count = state['ped_collision_count']
+        sim.car_collision_count = state['car_collision_count']
+        sim.active_car_pairs = np.array(sorted((a << 32) | b for a, b in state['active_car_pairs']), dtype=np.int64)
+        near = state['pedestrian_near']
+        sim.pedestrian_near = None if near is None else near.any(axis=1)
+        return sim
+
+    @property
+    def elapsed_seconds(self):
+        return self.tick // FPS
+
+    def spawn(self, indices):
+        arrivals = self.arrivals
+        kinds = arrivals.kinds[indices.start:indices.stop]
+        codes = arrivals.codes[indices.start:indices.stop].astype(np.int64)
+        turns = arrivals.turns[indices.start:indices.stop]
+        cars = kinds == CAR
+
+        new_dirs = codes[cars]
+        n = len(new_dirs)
+        if n:
+            self.car_id = np.concatenate([self.car_id, np.arange(self.next_car_id, self.next_car_id + n)])
+            self.next_car_id += n
+            self.car_pos = np.concatenate([self.car_pos, CAR_START[new_dirs]])
+            self.car_dir = np.concatenate([self.car_dir, new_dirs])
+            self.car_speed = np.concatenate([self.car_speed, np.full(n, 2.0)])
+            self.passed_light = np.concatenate([self.passed_light, np.zeros(n, dtype=bool)])
+            self.turn_right = np.concatenate([self.turn_right, turns[cars]])
+            self.has_turned = np.concatenate([self.has_turned, np.zeros(n, dtype=bool)])
+
+        new_crossings = codes[~cars]
+        n = len(new_crossings)
+        if n:
+            self.ped_id = np.concatenate([self.ped_id, np.arange(self.next_ped_id, self.next_ped_id + n)])
+            self.next_ped_id += n
+            self.ped_pos = np.concatenate([self.ped_pos, PED_START[new_crossings]])
+            self.ped_crossing = np.concatenate([self.ped_crossing, new_crossings])
+            self.ped_speed = np.concatenate([self.ped_speed, np.ones(n)])
+            self.ped_passed = np.concatenate([self.ped_passed, np.zeros(n, dtype=bool)])
+
+    def move_cars(self):
+        # Zwraca True, gdy ruszył się którykolwiek pojazd
+        pos, d = self.car_pos, self.car_dir
+        n = len(d)
+        if n == 0:
+            return False
+        rows = np.arange(n)
+        axis = AXIS[d]
+        front = SIGN[d] * pos[rows, axis] + FRONT[d]
+
+        # --- SPRAWDZENIE ŚWIATEŁ ---
+        green = np.array([self.light.vehicle_green(k) for k in 'NSEW'])
+        waiting = ~self.has_turned & ~self.passed_light
+        stop = waiting & (front >= LIGHT_THRESHOLD[d]) & ~green[d]
+        self.passed_light |= waiting & ~stop & (front > self.pass_threshold[d])
+
+        # --- PIESI W POBLIŻU ---
+        stop |= self.pedestrian_near
+
+        # --- NOWE POŁOŻENIE, GDYBY POJAZD RUSZYŁ ---
+        new_pos = pos.copy()
+        new_dir = d.copy()
+        new_turned = self.has_turned.copy()
+        speed = self.car_speed
+        turning = self.turn_right & ~self.has_turned & self.passed_light
+        r = RIGHT[d]
+        axis_r = AXIS[r]
+        inside = SIGN[r] * pos[rows, axis_r] < TURN_THRESHOLD[d]
+        side_step = turning & inside
+        finish = turning & ~inside
+        straight = ~turning
+        new_pos[rows[side_step], axis_r[side_step]] += (SIGN[r] * speed)[side_step]
+        new_pos[rows[straight], axis[straight]] += (SIGN[d] * speed)[straight]
+        new_dir[finish] = r[finish]
+        new_turned |= finish
+
+        # --- JAZDA ZA POPRZEDZAJĄCYM POJAZDEM ---
+        moving = follow(0, pos, d, new_pos, new_dir, stop)
+
+        self.car_pos = np.where(moving[:, None], new_pos, pos)
+        self.car_dir = np.where(moving, new_dir, d)
+        self.has_turned = np.where(moving, new_turned, self.has_turned)
+        return bool(moving.any())
+
+    def move_pedestrians(self):
+        # Zwraca True, gdy szedł którykolwiek pieszy
+        if len(self.ped_crossing) == 0:
+            return False
+        c = self.ped_crossing
+        if self.light.buffer_active:
+            green = np.zeros(2, dtype=bool)
+        else:
+            green = np.array([self.light.pedestrian_state == 'NS', self.light.pedestrian_state == 'EW'])
+        walking = self.ped_passed | green[PED_GROUP[c]]
+        self.ped_pos += PED_STEP[c] * (self.ped_speed * walking)[:, None]
+        rows = np.arange(len(c))
+        reached = PED_SIGN[c] * self.ped_pos[rows, PED_AXIS[c]] >= PED_PASS_THRESHOLD[c]
+        self.ped_passed |= walking & reached
+        return bool(walking.any())
+
+    # Przeskok nad taktami bez ruchu - ten sam warunek co w silniku obiektowym
+    skip_idle = Simulation.skip_idle
+
+    def pedestrian_proximity(self):
+        # Czy przy pojeździe jest którykolwiek pieszy
+        near = np.zeros(len(self.car_dir), dtype=bool)
+        near[pedestrian_pairs(0, self.car_pos, 0, self.ped_pos)[0]] = True
+        return near
+
+    def detect_pedestrian_collisions(self):
+        c, p = pedestrian_pairs(0, self.car_pos, 0, self.ped_pos)
+        hit = np.zeros(len(self.ped_crossing), dtype=bool)
+        hit[p] = True
+        self.ped_collision_count += int(hit.sum())
+        keep = ~hit
+        # Piesi potrąceni znikają - bliskość liczy się tylko z pozostałymi
+        self.pedestrian_near = np.zeros(len(self.car_dir), dtype=bool)
+        self.pedestrian_near[c[keep[p]]] = True
+        self.ped_id = self.ped_id[keep]
+        self.ped_pos = self.ped_pos[keep]
+        self.ped_crossing = self.ped_crossing[keep]
+        self.ped_speed = self.ped_speed[keep]
+        self.ped_passed = self.ped_passed[keep]
+
+    def detect_car_collisions(self):
+        pairs, _ = car_collision_pairs(0, self.car_pos, self.car_id)
+        # Nowa kolizja liczy się tylko wtedy, gdy para nie zderzała się w poprzednim takcie
+        self.car_collision_count += int(new_pairs(pairs, self.active_car_pairs).sum())
+        self.active_car_pairs = pairs
+
+    def despawn(self):
+        pos = self.car_pos
+        keep = (pos[:, 0] >= 0) & (pos[:, 0] <= WIDTH) & (pos[:, 1] >= 0) & (pos[:, 1] <= HEIGHT)
+        if not keep.all():
+            self.pedestrian_near = self.pedestrian_near[keep]
+            self.car_id = self.car_id[keep]
+            self.car_pos = self.car_pos[keep]
+            self.car_dir = self.car_dir[keep]
+            self.car_speed = self.car_speed[keep]
+            self.passed_light = self.passed_light[keep]
+            self.turn_right = self.turn_right[keep]
+            self.has_turned = self.has_turned[keep]
+
+        pos = self.ped_pos
+        keep = (pos[:, 0] >= 0) & (pos[:, 0] <= WIDTH) & (pos[:, 1] >= 0) & (pos[:, 1] <= HEIGHT)
+        if not keep.all():
+            self.ped_id = self.ped_id[keep]
+            self.ped_pos = self.ped_pos[keep]
+            self.ped_crossing = self.ped_crossing[keep]
+            self.ped_speed = self.ped_speed[keep]
+            self.ped_passed = self.ped_passed[keep]
+            # Pieszy, który zniknął, mógł być jedynym w pobliżu pojazdu - liczymy od nowa
+            self.pedestrian_near = self.pedestrian_proximity()
+
+    def step(self):
+        self.light.update()
+        self.tick += 1
+
+        due = self.arrivals.due(self.tick)
+        if due:
+            self.spawn(due)
+        if due or self.pedestrian_near is None:
+            self.pedestrian_near = self.pedestrian_proximity()
+
+        moved = self.move_cars()
+        walked = self.move_pedestrians()
+        self.idle = not due and not moved and not walked
+        self.detect_pedestrian_collisions()
+        self.detect_car_collisions()
+        self.despawn()
+
+
+def run_headless(duration=SIM_SECONDS, seed=None, arrivals='fixed', variant=DEFAULT_VARIANT, record=None):
+    sim = NumpySimulation(seed, duration, *make_arrivals(arrivals), variant)
+    return run_steps(sim, duration, record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Symulacja skrzyżowania - silnik NumPy (bez okna)")
+    parser.add_argument("--duration", "-d", type=int, default=SIM_SECONDS,
+                        help="czas symulacji w sekundach")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="ziarno generatora losowego (domyślnie losowe)")
+    parser.add_argument("--arrivals", choices=["fixed", "poisson"], default="fixed",
+                        help="przyjazdy co stały odstęp albo proces Poissona")
+    parser.add_argument("--variant", choices=list(VARIANTS), default=DEFAULT_VARIANT.name,
+                        help="wariant skrzyżowania (sterownik sygnalizacji i progi)")
+    parser.add_argument("--record", default=None,
+                        help="zapisz trajektorię do pliku (odtwarzanie: python trajectory.py PLIK)")
+    parser.add_argument("--headless", action="store_true",
+                        help="dla zgodności z run_simulation.py (silnik zawsze działa bez okna)")
+    args = parser.parse_args()
+
+    sim = run_headless(args.duration, args.seed, args.arrivals, VARIANTS[args.variant], args.record)
+    print(f"Symulacja zakończona po {args.duration} s.")
+    print(f"Liczba kolizji pieszych: {sim.ped_collision_count}")
+    print(f"Liczba kolizji pojazdów: {sim.car_collision_count}")
+    print(f"Ziarno: {sim.seed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import json
+import time
+from array import array
+
+import numpy as np
+
+# Czas poszczególnych etapów taktu mierzony zegarem monotonicznym (ns). Profiler jest
+# włączony, gdy symulacja go dostanie (Simulation(..., profiler=PhaseProfiler())); bez niego
+# w pętli zostaje jedno sprawdzenie na etap.
+
+PHASES = ('light', 'spawn', 'cars', 'pedestrians', 'ped_collisions', 'car_collisions', 'despawn', 'draw')
+PERCENTILES = (50, 90, 99)
+
+
+class PhaseProfiler:
+    def __init__(self):
+        # Surowe czasy w tablicach int64 (8 B na pomiar) - percentyle liczone dokładnie
+        self.samples = {phase: array('q') for phase in PHASES}
+        self.last = 0
+
+    def begin(self):
+        self.last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        # Czas od begin() albo poprzedniego lap() zaliczany etapowi phase
+        now = time.perf_counter_ns()
+        self.samples[phase].append(now - self.last)
+        self.last = now
+
+    def values(self, phase, last=None):
+        values = np.frombuffer(self.samples[phase], dtype=np.int64)
+        return values if last is None else values[-last:]
+
+    def histogram(self, phase):
+        # Przedziały potęg dwójki: [2^k, 2^(k+1)) ns -> liczba pomiarów
+        values = self.values(phase)
+        if not len(values):
+            return {}
+        counts = np.bincount(np.log2(np.maximum(values, 1)).astype(int))
+        return {2 ** k: int(n) for k, n in enumerate(counts) if n}
+
+    def summary(self):
+        # etap -> liczba pomiarów, suma i statystyki w ms, udział w sumie wszystkich etapów
+        total = sum(int(self.values(phase).sum()) for phase in PHASES) or 1
+        stats = {}
+        for phase in PHASES:
+            values = self.values(phase)
+            if not len(values):
+                continue
+            stats[phase] = {
+                'count': len(values),
+                'total_ms': float(values.sum()) / 1e6,
+                'share': float(values.sum()) / total,
+                'mean_ms': float(values.mean()) / 1e6,
+                **{f'p{p}_ms': float(np.percentile(values, p)) / 1e6 for p in PERCENTILES},
+                'max_ms': float(values.max()) / 1e6,
+            }
+        return stats
+
+    def report(self):
+        lines = [f"{'etap':<16}{'liczba':>8}{'suma ms':>11}{'udział':>8}{'średnio':>10}"
+                 + "".join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'max':>9}"]
+        for phase, s in self.summary().items():
+            lines.append(f"{phase:<16}{s['count']:>8}{s['total_ms']:>11.1f}{s['share']:>8.1%}{s['mean_ms']:>10.3f}"
+                         + "".join(f"{s[f'p{p}_ms']:>9.3f}" for p in PERCENTILES) + f"{s['max_ms']:>9.3f}")
+        lines.append("(czasy w ms; histogramy w pliku --profile PLIK)")
+        return "\n".join(lines)
+
+    def hud_lines(self, last):
+        # Średni czas etapów z ostatnich last pomiarów - do wyświetlenia na planszy
+        lines = []
+        for phase in PHASES:
+            values = self.values(phase, last)
+            if len(values):
+                lines.append(f"{phase}: {values.mean() / 1e6:.2f} ms")
+        return lines
+
+    def save(self, path):
+        data = {
+            phase: {**stats, 'histogram_ns': self.histogram(phase)}
+            for phase, stats in self.summary().items()
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
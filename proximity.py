@@ -0,0 +1,22 @@
+import numpy as np
+
+# Wspólne jądro bliskości pojazd-pieszy dla obu silników
+
+
+def pedestrian_proximity(car_xy, ped_xy, car_size, ped_size):
+    # Maska (pojazdy x piesi): pieszy bliżej środka pojazdu niż car_size / 2 + ped_size.
+    # car_xy - lewe górne narożniki pojazdów, ped_xy - środki pieszych; kwadraty odległości.
+    # Dopuszczalne wiodące osie (np. replik): (..., n, 2) x (..., m, 2) -> (..., n, m)
+    half = car_size / 2
+    dx = ped_xy[..., None, :, 0] - (car_xy[..., :, None, 0] + half)
+    dy = ped_xy[..., None, :, 1] - (car_xy[..., :, None, 1] + half)
+    return dx * dx + dy * dy < (half + ped_size) ** 2
+
+
+def positions(agents):
+    # Tablica (n, 2) współrzędnych obiektów z atrybutami x, y
+    xy = np.empty((len(agents), 2))
+    for i, agent in enumerate(agents):
+        xy[i, 0] = agent.x
+        xy[i, 1] = agent.y
+    return xy
@@ -0,0 +1,58 @@
+import pygame
+
+# Pamięć podręczna renderowania: czcionki tworzone raz, etykiety z numerami agentów
+# renderowane raz na agenta, a napisy HUD tylko wtedy, gdy zmieni się ich treść.
+# Statyczne tło rysowane jest raz; w każdej klatce przywracamy je tylko pod elementami
+# z poprzedniej klatki i przekazujemy do display.update listę zmienionych prostokątów.
+
+
+class RenderCache:
+    def __init__(self, display=True):
+        # display=False - rysowanie na powierzchni poza ekranem (eksport klatek), bez display.update
+        self.display = display
+        self.fonts = {}
+        self.labels = {}         # etykiety z poprzedniej klatki: klucz -> powierzchnia
+        self.frame_labels = {}   # etykiety użyte w bieżącej klatce
+        self.texts = {}          # napisy HUD: miejsce -> (treść, powierzchnia)
+        self.background = None   # statyczne tło planszy
+        self.dirty = None        # prostokąty narysowane w poprzedniej klatce
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.SysFont(None, size)
+        return font
+
+    def label(self, key, text, color, size=14):
+        # Etykieta agenta (key np. ('car', id)); treść etykiety agenta się nie zmienia
+        surface = self.labels.pop(key, None)
+        if surface is None:
+            surface = self.frame_labels.get(key)
+        if surface is None:
+            surface = self.font(size).render(text, True, color)
+        self.frame_labels[key] = surface
+        return surface
+
+    def text(self, slot, text, color, size=36):
+        cached = self.texts.get(slot)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        surface = self.font(size).render(text, True, color)
+        self.texts[slot] = (text, surface)
+        return surface
+
+    def begin_frame(self, win):
+        if self.dirty is None:
+            win.blit(self.background, (0, 0))
+            self.dirty = [win.get_rect()]
+        else:
+            for rect in self.dirty:
+                win.blit(self.background, rect, rect)
+
+    def end_frame(self, dirty):
+        # Odświeżamy miejsca starych i nowych elementów
+        if self.display:
+            pygame.display.update(self.dirty + dirty)
+        self.dirty = dirty
+        # Etykiety nieużyte w tej klatce należą do agentów, którzy zniknęli z planszy
+        self.labels, self.frame_labels = self.frame_labels, {}
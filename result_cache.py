@@ -0,0 +1,113 @@
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Pamięć podręczna wyników przebiegów na dysku, adresowana treścią: klucz to skrót z odcisku
+# silnika (źródła skryptu i lokalnych modułów, które importuje na poziomie modułu - importy
+# wewnątrz funkcji, np. rysowania, zapisu trajektorii czy profilera, nie liczą się),
+# pełnej konfiguracji i ziarna.
+# Zmiana skrzyzowanie_3.py unieważnia tylko wpisy policzone tym skryptem; zmiana wspólnego
+# intersection.py - wszystkie, które z niego korzystają. Po przekroczeniu rozmiaru usuwane są
+# wpisy najdawniej używane.
+
+
+def top_level_imports(tree):
+    # Importy wykonywane przy wczytaniu modułu: na poziomie modułu, także w if/try,
+    # ale nie w ciałach funkcji i klas
+    todo = list(tree.body)
+    while todo:
+        node = todo.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, (ast.If, ast.Try, ast.ExceptHandler)):
+            todo.extend(ast.iter_child_nodes(node))
+
+
+def local_sources(script_path):
+    # Skrypt i (przechodnio) moduły z jego katalogu, importowane na poziomie modułu
+    script = Path(script_path).resolve()
+    directory = script.parent
+    found, todo = set(), [script]
+    while todo:
+        path = todo.pop()
+        if path in found:
+            continue
+        found.add(path)
+        for node in top_level_imports(ast.parse(path.read_bytes(), str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = directory / (name.split('.')[0] + '.py')
+                if candidate.exists():
+                    todo.append(candidate)
+    return sorted(found)
+
+
+def engine_fingerprint(script_path):
+    digest = hashlib.sha256()
+    for path in local_sources(script_path):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory='.wyniki_cache', max_bytes=200 * 2 ** 20):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(fingerprint, config, seed):
+        text = json.dumps({'engine': fingerprint, 'config': config, 'seed': seed}, sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        # Czas modyfikacji służy za czas ostatniego użycia przy usuwaniu
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Zapis przez plik tymczasowy - przerwany zapis nie zostawia uszkodzonego wpisu
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+
+    def evict(self):
+        # Usuwamy najdawniej używane wpisy, aż całość zmieści się w max_bytes
+        if not self.directory.exists():
+            return 0
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
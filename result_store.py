@@ -0,0 +1,64 @@
+import json
+import os
+
+# Wyniki paczki dopisywane na bieżąco do pliku JSONL (jeden przebieg w wierszu).
+# Po przerwaniu paczki w pliku zostaje wszystko, co zdążyło się zapisać, a ponowne
+# uruchomienie pomija przebiegi już zapisane dla tego samego ziarna i konfiguracji.
+
+
+class ResultStore:
+    def __init__(self, path, flush_every=20):
+        self.path = path
+        self.flush_every = flush_every
+        self.pending = []
+        self.file = None
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Niedokończony wiersz po przerwanym zapisie
+                    continue
+
+    def append(self, record):
+        self.pending.append(record)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = self._open()
+        self.file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.pending))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _open(self):
+        # Urwany ostatni wiersz zamykamy, żeby nie skleił się z nowym rekordem
+        broken = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                broken = f.read(1) != b"\n"
+        file = open(self.path, "a", encoding="utf-8")
+        if broken:
+            file.write("\n")
+        return file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,82 +1,588 @@
 #!/usr/bin/env python3
 # run_simulations.py
 
-import subprocess
 import argparse
-import re
-import pandas as pd
+import hashlib
+import importlib.util
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict
+from math import inf, log, sqrt
+from pathlib import Path
+from statistics import NormalDist
 
-def parse_collisions(output):
+import numpy as np
 
-    ped_match = re.search(r"Liczba kolizji pieszych:\s*(\d+)", output)
-    car_match = re.search(r"Liczba kolizji pojazdów:\s*(\d+)", output)
+from result_cache import ResultCache, engine_fingerprint
+from result_store import ResultStore
 
-    if not ped_match or not car_match:
-        raise ValueError("Nie udało się odczytać liczby kolizji z wyjścia symulacji.")
-    return int(ped_match.group(1)), int(car_match.group(1))
+# Silniki importujemy w procesach roboczych - bez komunikatu powitalnego pygame
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 
-def run_one(script_path):
+_engines = {}
 
-    # python3 --unbuffered, aby od razu otrzymywać całe stdout
-    proc = subprocess.run(
-        ["python3", "-u", script_path],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+
+@dataclass
+class ReplicaResult:
+    variant: str
+    run: int
+    seed: int
+    arrivals: str
+    duration: int
+    collisions_ped: int
+    collisions_car: int
+    ticks: int
+    warmup: int = 0
+
+
+def load_engine(script_path):
+    # Każdy proces ładuje moduł silnika tylko raz
+    path = str(Path(script_path).resolve())
+    engine = _engines.get(path)
+    if engine is None:
+        spec = importlib.util.spec_from_file_location(Path(path).stem, path)
+        engine = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = engine
+        spec.loader.exec_module(engine)
+        _engines[path] = engine
+    return engine
+
+
+def replica_seeds(base_seed, n):
+    # Niezależne strumienie dla kolejnych przebiegów; przebieg i dostaje zawsze
+    # to samo ziarno, niezależnie od liczby procesów i kolejności wykonania.
+    # 53 bity, żeby ziarno przetrwało zapis do Excela (liczby zmiennoprzecinkowe)
+    children = np.random.SeedSequence(base_seed).spawn(n)
+    return [int(child.generate_state(1, np.uint64)[0]) >> 11 for child in children]
+
+
+def variant_args(engine, variant):
+    # Wariant z intersection.VARIANTS (tylko silniki z parametrem variant); None - domyślny silnika
+    return () if variant is None else (engine.VARIANTS[variant],)
+
+
+def variant_label(script_path, variant):
+    return variant if variant is not None else Path(script_path).stem
+
+
+def run_replica(script_path, run=1, seed=None, duration=None, arrivals='fixed', variant=None,
+                snapshot=None):
+    # snapshot - migawka stanu po rozbiegu (silnik z run_from_snapshot, np. intersection.py)
+    engine = load_engine(script_path)
+    if duration is None:
+        duration = engine.SIM_SECONDS
+    if snapshot is not None:
+        sim = engine.run_from_snapshot(snapshot, duration, seed, arrivals, *variant_args(engine, variant))
+    else:
+        sim = engine.run_headless(duration, seed, arrivals, *variant_args(engine, variant))
+    return ReplicaResult(
+        variant=variant_label(script_path, variant),
+        run=run,
+        seed=sim.seed,
+        arrivals=arrivals,
+        duration=duration,
+        collisions_ped=sim.ped_collision_count,
+        collisions_car=sim.car_collision_count,
+        ticks=sim.tick,
+        warmup=0 if snapshot is None else snapshot['tick'] // engine.FPS,
     )
-    if proc.returncode != 0:
-    
-        raise RuntimeError(f"Symulacja zakończona błędem:\n{proc.stderr}")
-    return proc.stdout
+
+
+def run_chunk(script_path, runs, seeds, duration=None, arrivals='fixed', variant=None, snapshot=None):
+    # Kilka przebiegów w jednym zadaniu; silnik z run_replicas liczy je wszystkie naraz
+    engine = load_engine(script_path)
+    if snapshot is not None or not hasattr(engine, "run_replicas"):
+        return [run_replica(script_path, run, seed, duration, arrivals, variant, snapshot)
+                for run, seed in zip(runs, seeds)]
+    if duration is None:
+        duration = engine.SIM_SECONDS
+    sim = engine.run_replicas(seeds, duration, arrivals, *variant_args(engine, variant))
+    return [
+        ReplicaResult(
+            variant=variant_label(script_path, variant),
+            run=run,
+            seed=seed,
+            arrivals=arrivals,
+            duration=duration,
+            collisions_ped=int(sim.ped_collision_count[k]),
+            collisions_car=int(sim.car_collision_count[k]),
+            ticks=sim.tick,
+        )
+        for k, (run, seed) in enumerate(zip(runs, seeds))
+    ]
+
+
+# Pola ReplicaResult przechowywane w pamięci podręcznej (reszta wynika z zadania)
+CACHED_FIELDS = ('collisions_ped', 'collisions_car', 'ticks', 'warmup')
+
+
+def snapshot_hash(snapshot):
+    return None if snapshot is None else hashlib.sha256(pickle.dumps(snapshot)).hexdigest()
+
+
+def cache_config(script_path, variant, duration, arrivals, snapshot=None):
+    # Wszystko, od czego poza ziarnem i kodem silnika zależy wynik przebiegu
+    return {
+        'script': Path(script_path).name,
+        'variant': variant,
+        'duration': duration,
+        'arrivals': arrivals,
+        'snapshot': snapshot_hash(snapshot),
+    }
+
+
+def engine_pool(script_path, workers=None):
+    # Pula procesów z silnikiem wczytanym raz na proces
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=load_engine,
+                               initargs=(script_path,))
+
+
+def run_batch(script_path, n, base_seed, duration=None, arrivals='fixed', workers=None,
+              on_result=None, on_error=None, chunk=1, variants=(None,), skip=frozenset(), collect=True,
+              snapshots=None, cache=None, executor=None):
+    # Jedna pula procesów na całą paczkę; silnik wczytywany raz na proces.
+    # Zadanie obejmuje chunk kolejnych przebiegów (przydatne dla batched_engine.py).
+    # Wszystkie warianty liczone są w tych samych procesach, z tymi samymi ziarnami.
+    # skip - pary (wariant, ziarno) już policzone; collect=False - wyniki tylko przez on_result;
+    # snapshots - wariant -> stan po rozbiegu tego wariantu, z którego startują jego przebiegi;
+    # cache - ResultCache: przebiegi policzone wcześniej tym samym kodem zwracane są od razu;
+    # executor - pula z engine_pool(script_path) wspólna dla kilku paczek (bez niej - nowa pula)
+    seeds = replica_seeds(base_seed, n)
+    results = []
+
+    def deliver(result):
+        if collect:
+            results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    if cache is not None:
+        fingerprint = engine_fingerprint(script_path)
+        if duration is None:
+            duration = load_engine(script_path).SIM_SECONDS
+    keys = {}
+    jobs = []
+    for variant in variants:
+        label = variant_label(script_path, variant)
+        snapshot = (snapshots or {}).get(variant)
+        todo = [(run, seed) for run, seed in enumerate(seeds, start=1) if (label, seed) not in skip]
+        if cache is not None:
+            config = cache_config(script_path, variant, duration, arrivals, snapshot)
+            missing = []
+            for run, seed in todo:
+                key = keys[label, seed] = ResultCache.key(fingerprint, config, seed)
+                value = cache.get(key)
+                if value is None:
+                    missing.append((run, seed))
+                else:
+                    deliver(ReplicaResult(label, run, seed, arrivals, duration, **value))
+            todo = missing
+        for i in range(0, len(todo), chunk):
+            runs, chunk_seeds = zip(*todo[i:i + chunk])
+            jobs.append((variant, list(runs), list(chunk_seeds), snapshot))
+    with nullcontext(executor) if executor is not None else engine_pool(script_path, workers) as pool:
+        futures = {
+            pool.submit(run_chunk, script_path, runs, chunk_seeds, duration, arrivals, variant, snapshot): runs
+            for variant, runs, chunk_seeds, snapshot in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                chunk_results = future.result()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                for run in futures[future]:
+                    on_error(run, e)
+                continue
+            for result in chunk_results:
+                if cache is not None:
+                    value = {name: getattr(result, name) for name in CACHED_FIELDS}
+                    cache.put(keys[result.variant, result.seed], value)
+                deliver(result)
+    if cache is not None:
+        cache.evict()
+    order = {variant_label(script_path, v): i for i, v in enumerate(variants)}
+    results.sort(key=lambda r: (order[r.variant], r.run))
+    return results
+
+
+# Wartości krytyczne rozkładu t-Studenta (przedział dwustronny) dla 1 ... 30 stopni swobody
+T_CRITICAL = {
+    0.90: (6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+           1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+           1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697),
+    0.95: (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+           2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+           2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042),
+    0.99: (63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250, 3.169,
+           3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878, 2.861, 2.845,
+           2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771, 2.763, 2.756, 2.750),
+}
+
+
+def t_critical(confidence, df):
+    table = T_CRITICAL.get(round(confidence, 4))
+    if table is not None and df <= len(table):
+        return table[df - 1]
+    # Poza tablicą: rozwinięcie Cornisha-Fishera wokół kwantyla normalnego
+    # (dla df > 30 błąd poniżej 0.001, dla mniejszych kilka tysięcznych)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def ci_half_width(values, confidence=0.95):
+    # Połowa szerokości przedziału ufności średniej (t-Student). Liczby kolizji są całkowite
+    # i rzadkie: n przebiegów bez żadnej kolizji nie znaczy, że średnia to dokładnie 0 -
+    # dolne ograniczenie -ln(1 - poziom) / n (reguła trzech: 3 / n przy 95%) nie pozwala
+    # uznać precyzji przy zerowej wariancji próby.
+    n = len(values)
+    if n < 2:
+        return inf
+    t = t_critical(confidence, n - 1)
+    return max(t * float(np.std(values, ddof=1)) / sqrt(n), -log(1 - confidence) / n)
+
+
+def split(runs):
+    # [(piesi, pojazdy), ...] -> ([piesi, ...], [pojazdy, ...])
+    return [ped for ped, _ in runs], [car for _, car in runs]
+
+
+def precision(samples, confidence=0.95):
+    # samples: wariant -> {ziarno: (kolizje pieszych, kolizje pojazdów)}
+    # wynik: wariant -> (n, (średnia, połowa przedziału) dla pieszych, to samo dla pojazdów)
+    return {
+        label: (len(runs),) + tuple(
+            (float(np.mean(values)) if values else None, ci_half_width(values, confidence))
+            for values in split(list(runs.values()))
+        )
+        for label, runs in samples.items()
+    }
+
+
+def paired_differences(samples, a, b):
+    # Różnice a - b dla ziaren policzonych w obu wariantach. To samo ziarno to ten sam
+    # harmonogram przyjazdów i decyzji o skręcie (wspólne liczby losowe), więc różnica
+    # wynika z wariantu, a nie z losowania.
+    common = sorted(samples[a].keys() & samples[b].keys())
+    return [tuple(x - y for x, y in zip(samples[a][seed], samples[b][seed])) for seed in common]
+
+
+def compare(samples, a, b, confidence=0.95):
+    # (n par, [(średnia różnica, połowa przedziału z parowania, połowa przedziału bez parowania)]
+    # dla pieszych i pojazdów)
+    differences = paired_differences(samples, a, b)
+    n = len(differences)
+    rows = []
+    for k, values in enumerate(split(differences)):
+        own = [samples[a][seed][k] for seed in samples[a]], [samples[b][seed][k] for seed in samples[b]]
+        if n < 2 or min(len(v) for v in own) < 2:
+            rows.append((float(np.mean(values)) if n else None, inf, inf))
+            continue
+        t = t_critical(confidence, sum(len(v) for v in own) - 2)
+        independent = t * sqrt(sum(float(np.var(v, ddof=1)) / len(v) for v in own))
+        rows.append((float(np.mean(values)), ci_half_width(values, confidence), independent))
+    return n, rows
+
+
+def run_sequential(script_path, base_seed, width, max_n, wave, confidence=0.95, min_n=10,
+                   variants=(None,), samples=None, skip=frozenset(), on_result=None, paired=False,
+                   **batch_kwargs):
+    # Kolejne fale przebiegów, aż przedział ufności średniej liczby kolizji pieszych i pojazdów
+    # na przebieg będzie węższy niż width (pełna szerokość) albo wariant wyczerpie max_n przebiegów.
+    # Wariant z wystarczającą precyzją wypada z kolejnych fal. Ziarna to kolejne elementy
+    # replica_seeds(base_seed, max_n), więc przerwany przebieg wznawia się jak zwykła paczka.
+    # paired=True (dwa warianty) - kryterium dotyczy różnicy par z tym samym ziarnem.
+    # samples - wariant -> {ziarno: (kolizje pieszych, kolizje pojazdów)} policzone wcześniej
+    labels = [variant_label(script_path, v) for v in variants]
+    samples = {label: dict((samples or {}).get(label, {})) for label in labels}
+    done = set(skip)
+
+    def collect(result):
+        samples[result.variant][result.seed] = (result.collisions_ped, result.collisions_car)
+        done.add((result.variant, result.seed))
+        if on_result is not None:
+            on_result(result)
+
+    def precise(runs):
+        return len(runs) >= min_n and all(2 * ci_half_width(values, confidence) <= width for values in split(runs))
+
+    # Jedna pula na wszystkie fale - procesy nie wczytują silnika od nowa co falę
+    n = 0
+    with engine_pool(script_path, batch_kwargs.get('workers')) as pool:
+        while n < max_n:
+            if paired:
+                active = [] if precise(paired_differences(samples, *labels)) else list(variants)
+            else:
+                active = [v for v, label in zip(variants, labels) if not precise(list(samples[label].values()))]
+            if not active:
+                break
+            n = min(max_n, max(n + wave, min_n))
+            run_batch(script_path, n, base_seed, variants=active, skip=done, on_result=collect, collect=False,
+                      executor=pool, **batch_kwargs)
+    return samples
+
 
 def main():
     parser = argparse.ArgumentParser(
-        
+        description="Wielokrotne uruchamianie symulacji skrzyżowania"
     )
     parser.add_argument(
         "--script",
         "-s",
-        required=True,
-       
+        default=str(Path(__file__).with_name("intersection.py")),
+        help="plik silnika, np. skrzyzowanie_3.py (domyślnie wspólny silnik intersection.py)",
+    )
+    parser.add_argument(
+        "--variant",
+        "-v",
+        nargs="+",
+        default=None,
+        help="warianty skrzyżowania do policzenia w jednej paczce, np. skrzyzowanie skrzyzowanie_3 "
+             "(silniki intersection.py, numpy_engine.py, batched_engine.py)",
     )
     parser.add_argument(
         "--n",
         "-n",
         type=int,
         default=50,
-        "
+        help="liczba przebiegów",
     )
     parser.add_argument(
         "--output",
         "-o",
-        default="wyniki_symulacji.xlsx",
-        
+        default="wyniki_symulacji.jsonl",
+        help="plik JSONL z wynikami, dopisywany na bieżąco; przebiegi już w nim zapisane są pomijane",
+    )
+    parser.add_argument(
+        "--excel",
+        default=None,
+        help="na koniec zapisz wyniki tej paczki do pliku Excela, np. wyniki_symulacji.xlsx",
+    )
+    parser.add_argument(
+        "--duration",
+        "-d",
+        type=int,
+        default=None,
+        help="czas jednej symulacji w sekundach (domyślnie jak w silniku)",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="liczba procesów roboczych (domyślnie liczba rdzeni)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="ziarno główne paczki (domyślnie losowe)",
+    )
+    parser.add_argument(
+        "--arrivals",
+        choices=["fixed", "poisson"],
+        default="fixed",
+        help="przyjazdy co stały odstęp albo proces Poissona",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        help="rozbieg [s] liczony raz; wszystkie przebiegi startują z jego stanu (silniki intersection.py i skrzyzowanie*.py)",
+    )
+    parser.add_argument(
+        "--chunk",
+        "-c",
+        type=int,
+        default=1,
+        help="liczba przebiegów w jednym zadaniu (silnik batched_engine.py liczy je naraz)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=".wyniki_cache",
+        help="katalog pamięci podręcznej wyników (klucz: kod silnika, konfiguracja, ziarno)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=200,
+        help="największy rozmiar pamięci podręcznej w MB (nadmiar: najdawniej używane wpisy)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="licz wszystkie przebiegi od nowa, bez pamięci podręcznej",
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        default=None,
+        help="tryb sekwencyjny: dokładaj fale przebiegów, aż przedział ufności średniej liczby kolizji "
+             "pieszych i pojazdów na przebieg będzie węższy niż podana wartość (--n nie jest wtedy używane)",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="poziom ufności przedziału w trybie sekwencyjnym",
+    )
+    parser.add_argument(
+        "--max-n",
+        type=int,
+        default=1000,
+        help="budżet trybu sekwencyjnego: najwięcej przebiegów na wariant",
+    )
+    parser.add_argument(
+        "--min-n",
+        type=int,
+        default=10,
+        help="najmniej przebiegów na wariant przed sprawdzeniem precyzji",
+    )
+    parser.add_argument(
+        "--wave",
+        type=int,
+        default=None,
+        help="liczba przebiegów w jednej fali trybu sekwencyjnego (domyślnie 2 x liczba procesów, min. 10)",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="porównanie dwóch wariantów z --variant: różnice par przebiegów o tym samym ziarnie "
+             "(te same przyjazdy i skręty); z --ci-width kryterium dotyczy przedziału różnicy",
     )
     args = parser.parse_args()
+    sequential = args.ci_width is not None
+    if args.compare and (not args.variant or len(args.variant) != 2):
+        parser.error("--compare wymaga dokładnie dwóch wariantów w --variant")
+    n = args.max_n if sequential else args.n
 
-    results = []
-    for i in range(1, args.n + 1):
-        print(f"Uruchamiam symulację {i}/{args.n}…", end=" ")
-        try:
-            out = run_one(args.script)
-            ped, car = parse_collisions(out)
-            results.append({"run": i, "collisions_ped": ped, "collisions_car": car})
-            print(f"OK (piesi={ped}, pojazdy={car})")
-        except Exception as e:
-            print(f"\n[!] Błąd w symulacji {i}: {e}")
-            # Możesz tu zdecydować, czy przerwać cały proces, czy pominąć tę paczkę:
-            # raise
-            continue
+    # Skrypty skrzyzowanie*.py mają wariant na stałe; rozbieg mają tylko silniki obiektowe
+    engine = load_engine(args.script)
+    if args.variant and not hasattr(engine, "VARIANTS"):
+        parser.error(f"{Path(args.script).name} ma stały wariant - --variant wymaga silnika intersection.py, "
+                     "numpy_engine.py albo batched_engine.py")
+    if args.warmup and not hasattr(engine, "warm_up"):
+        parser.error(f"{Path(args.script).name} nie obsługuje --warmup (silniki intersection.py i skrzyzowanie*.py)")
+
+    store = ResultStore(args.output)
+    records = list(store.records())
+
+    base_seed = args.seed
+    if base_seed is None and records:
+        # Wznowienie przerwanej paczki: to samo ziarno główne, te same ziarna przebiegów
+        base_seed = records[-1]["base_seed"]
+    if base_seed is None:
+        base_seed = np.random.SeedSequence().entropy
+    print(f"Ziarno główne paczki: {base_seed}")
+
+    duration = args.duration or load_engine(args.script).SIM_SECONDS
+    variants = args.variant or [None]
+    # Rozbieg osobno dla każdego wariantu (własna sygnalizacja i margines od początku);
+    # skrót migawki trafia do zapisanych wierszy, żeby wznowienie nie mieszało rozbiegów
+    snapshots = {}
+    if args.warmup:
+        for variant in variants:
+            snapshots[variant] = engine.warm_up(args.warmup, base_seed, args.arrivals, *variant_args(engine, variant))
+        print(f"Rozbieg {args.warmup} s zakończony - przebiegi każdego wariantu startują z jego stanu")
+    hashes = {variant_label(args.script, v): snapshot_hash(snapshots.get(v)) for v in variants}
+
+    seeds = set(replica_seeds(base_seed, n))
+
+    def matches(r):
+        # Wiersz z tej samej konfiguracji (wariant, ziarno, przyjazdy, czas symulacji, rozbieg)
+        return (r["variant"] in hashes and r["seed"] in seeds and r["arrivals"] == args.arrivals
+                and r["duration"] == duration and r.get("warmup", 0) == args.warmup
+                and r.get("snapshot") == hashes[r["variant"]])
+
+    skip = {(r["variant"], r["seed"]) for r in records if matches(r)}
+    if skip:
+        print(f"Pomijam {len(skip)} przebiegów zapisanych wcześniej w {args.output}")
+
+    def stored_samples():
+        # wariant -> {ziarno: (kolizje pieszych, kolizje pojazdów)} z pliku wyników, dla tej konfiguracji
+        samples = {label: {} for label in hashes}
+        for r in store.records():
+            if matches(r):
+                samples[r["variant"]][r["seed"]] = (r["collisions_ped"], r["collisions_car"])
+        return samples
+
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size * 2 ** 20)
+    # W trybie sekwencyjnym liczba przebiegów wychodzi dopiero w trakcie
+    total = "" if sequential else f"/{args.n * len(variants) - len(skip)}"
+    done = 0
+
+    def report(result):
+        nonlocal done
+        done += 1
+        store.append({**asdict(result), "base_seed": base_seed, "snapshot": hashes[result.variant]})
+        print(f"[{done}{total}] {result.variant} symulacja {result.run}: "
+              f"OK (piesi={result.collisions_ped}, pojazdy={result.collisions_car})")
+
+    def report_error(run, e):
+        print(f"[!] Błąd w symulacji {run}: {e}")
+
+    with store:
+        if not sequential:
+            run_batch(args.script, args.n, base_seed, duration=duration,
+                      arrivals=args.arrivals, workers=args.workers, on_result=report, on_error=report_error,
+                      chunk=args.chunk, variants=variants, skip=skip, collect=False, snapshots=snapshots, cache=cache)
+        else:
+            wave = args.wave or max(2 * (args.workers or os.cpu_count() or 1), 10)
+            run_sequential(
+                args.script, base_seed, args.ci_width, args.max_n, wave, args.confidence, args.min_n,
+                variants=variants, samples=stored_samples(), skip=skip, on_result=report, paired=args.compare,
+                duration=duration, arrivals=args.arrivals, workers=args.workers, on_error=report_error,
+                chunk=args.chunk, snapshots=snapshots, cache=cache,
+            )
+    if cache is not None and cache.hits:
+        print(f"Z pamięci podręcznej: {cache.hits} przebiegów")
+
+    if sequential or args.compare:
+        samples = stored_samples()
+        target = f", cel: szerokość {args.ci_width:g}" if sequential else ""
+        print(f"\nŚrednie na przebieg (przedział ufności {args.confidence:.0%}{target}):")
+        for label, (count, ped, car) in precision(samples, args.confidence).items():
+            if not count:
+                print(f"  {label}: brak przebiegów")
+                continue
+            status = ""
+            if sequential and not args.compare:
+                ok = count >= args.min_n and 2 * max(ped[1], car[1]) <= args.ci_width
+                status = " - OK" if ok else " - budżet wyczerpany"
+            print(f"  {label}: n={count}, piesi {ped[0]:.3f} ± {ped[1]:.3f}, "
+                  f"pojazdy {car[0]:.3f} ± {car[1]:.3f}{status}")
+    if args.compare:
+        a, b = (variant_label(args.script, v) for v in variants)
+        n_pairs, rows = compare(samples, a, b, args.confidence)
+        print(f"\nRóżnica {a} - {b} (pary o tym samym ziarnie: {n_pairs}):")
+        for name, (mean, half, independent) in zip(("piesi", "pojazdy"), rows):
+            if mean is None:
+                print(f"  {name}: brak par")
+                continue
+            # Ile razy więcej przebiegów dałoby tę samą precyzję bez parowania
+            gain = f", {(independent / half) ** 2:.1f}x mniej przebiegów" if 0 < half < inf else ""
+            print(f"  {name}: {mean:+.3f} ± {half:.3f} (bez parowania ± {independent:.3f}{gain})")
+        if sequential:
+            ok = n_pairs >= args.min_n and all(2 * half <= args.ci_width for _, half, _ in rows)
+            print("  precyzja osiągnięta" if ok else "  budżet wyczerpany przed osiągnięciem precyzji")
+    print(f"\nWyniki zapisane w pliku: {args.output}")
 
-    if not results:
-        print("Brak prawidłowych wyników – nic nie zapisano.")
-        return
+    if args.excel:
+        import pandas as pd
 
-    # Tworzymy DataFrame i zapisujemy do Excela
-    df = pd.DataFrame(results)
-    # Kolumny: run, collisions_ped, collisions_car
-    df.to_excel(args.output, index=False)
-    print(f"\nZapisano wyniki do pliku: {args.output}")
+        rows = [r for r in store.records() if matches(r)]
+        if not rows:
+            print("Brak prawidłowych wyników – nic nie zapisano.")
+            return
+        # Kolumny: variant, run, seed, arrivals, duration, collisions_ped, collisions_car, ticks, warmup, base_seed,
+        # snapshot
+        df = pd.DataFrame(rows).sort_values(["variant", "run"])
+        df.to_excel(args.excel, index=False)
+        print(f"Zapisano wyniki do pliku: {args.excel}")
 
 if __name__ == "__main__":
     main()
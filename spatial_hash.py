@@ -0,0 +1,43 @@
+# Jednorodna siatka (spatial hash) do szukania par bliskich obiektów bez
+# sprawdzania wszystkich par. Obiekty muszą mieć atrybuty x i y.
+
+# Połowa sąsiedztwa 3x3: każda para sąsiednich komórek odwiedzana jest raz
+_HALF_NEIGHBOURHOOD = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def build_grid(items, cell_size):
+    grid = {}
+    for item in items:
+        key = (int(item.x // cell_size), int(item.y // cell_size))
+        cell = grid.get(key)
+        if cell is None:
+            grid[key] = [item]
+        else:
+            cell.append(item)
+    return grid
+
+
+def close_pairs(items, cell_size, max_dist_sq):
+    # Pary (a, b), dla których (dx^2 + dy^2) < max_dist_sq.
+    # Wymaga max_dist_sq <= cell_size^2 - wtedy wystarczą sąsiednie komórki.
+    grid = build_grid(items, cell_size)
+    for (cx, cy), cell in grid.items():
+        n = len(cell)
+        for i in range(n):
+            a = cell[i]
+            for j in range(i + 1, n):
+                b = cell[j]
+                dx = a.x - b.x
+                dy = a.y - b.y
+                if dx * dx + dy * dy < max_dist_sq:
+                    yield a, b
+        for ox, oy in _HALF_NEIGHBOURHOOD:
+            other = grid.get((cx + ox, cy + oy))
+            if other is None:
+                continue
+            for a in cell:
+                for b in other:
+                    dx = a.x - b.x
+                    dy = a.y - b.y
+                    if dx * dx + dy * dy < max_dist_sq:
+                        yield a, b
@@ -0,0 +1,231 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import intersection
+from result_cache import ResultCache, engine_fingerprint
+from result_store import ResultStore
+from run_simulation import replica_seeds
+
+# Przegląd parametrów: siatka albo lista konfiguracji x ziarna, liczone w puli procesów.
+# Konfiguracja ustawia stałe modułu intersection (te same, które dotąd poprawiało się ręcznie)
+# w procesie roboczym przed jej przebiegami; pozostałe parametry mają wartości domyślne.
+# Surowe wyniki (konfiguracja, ziarno) dopisywane są do JSONL jak w run_simulation.py, więc
+# przerwany przegląd można wznowić; na koniec powstaje tabela CSV z jednym wierszem na konfigurację.
+
+# Parametr -> typ wartości. Czasy w taktach (LIGHT_CYCLE, BUFFER) i ms (odstępy przyjazdów)
+# jak w intersection.py; BUFFER dotyczy wariantu z czerwonym dla wszystkich (domyślnie 3 * FPS).
+PARAMETERS = {
+    'variant': str,
+    'LIGHT_CYCLE': int,
+    'BUFFER': int,
+    'FPS': int,
+    'CAR_SPAWN_INTERVAL': float,
+    'PED_SPAWN_INTERVAL': float,
+    'TURN_RIGHT_PROBABILITY': float,
+    'CAR_SPEED': float,
+}
+MODULE_CONSTANTS = ('LIGHT_CYCLE', 'FPS', 'CAR_SPAWN_INTERVAL', 'PED_SPAWN_INTERVAL', 'TURN_RIGHT_PROBABILITY')
+DEFAULTS = {
+    'variant': intersection.DEFAULT_VARIANT.name,
+    **{name: getattr(intersection, name) for name in MODULE_CONSTANTS},
+    'CAR_SPEED': intersection.Car.SPEED,
+}
+
+
+def resolve(params):
+    # Pełny zestaw wartości konfiguracji (z domyślnymi), każda w typie z PARAMETERS -
+    # domyślne 1500 i podane 1500.0 to ta sama konfiguracja (klucz, pamięć podręczna, tabela)
+    values = {**DEFAULTS, **params}
+    values.setdefault('BUFFER', 3 * int(values['FPS']))
+    return {name: kind(values[name]) for name, kind in PARAMETERS.items()}
+
+
+def apply_config(params):
+    # Każde zadanie ustawia wszystkie parametry - proces roboczy liczy po kolei różne konfiguracje
+    values = resolve(params)
+    for name in MODULE_CONSTANTS:
+        setattr(intersection, name, values[name])
+    intersection.AllRedTrafficLight.BUFFER = values['BUFFER']
+    intersection.Car.SPEED = values['CAR_SPEED']
+    return intersection.VARIANTS[values['variant']]
+
+
+def run_config(params, seeds, duration, arrivals):
+    variant = apply_config(params)
+    results = []
+    for seed in seeds:
+        sim = intersection.run_headless(duration, seed, arrivals, variant)
+        results.append((seed, sim.ped_collision_count, sim.car_collision_count))
+    return results
+
+
+def parse_grid(items):
+    # ['LIGHT_CYCLE=240,300', 'variant=skrzyzowanie,skrzyzowanie_3'] -> iloczyn kartezjański
+    axes = []
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in PARAMETERS or not values:
+            raise SystemExit(f"Nieznany parametr albo brak wartości: {item!r} (parametry: {', '.join(PARAMETERS)})")
+        axes.append([(name, PARAMETERS[name](value)) for value in values.split(',')])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def load_configs(path):
+    # Plik JSON z listą słowników parametrów
+    with open(path, encoding="utf-8") as f:
+        configs = json.load(f)
+    for params in configs:
+        unknown = set(params) - set(PARAMETERS)
+        if unknown:
+            raise SystemExit(f"Nieznane parametry w {path}: {', '.join(sorted(unknown))}")
+    return [{name: PARAMETERS[name](value) for name, value in params.items()} for params in configs]
+
+
+def config_key(params):
+    return json.dumps(resolve(params), sort_keys=True)
+
+
+def summarize(configs, records):
+    # Jeden wiersz na konfigurację: wartości parametrów i statystyki kolizji z jej przebiegów
+    by_config = {}
+    for r in records:
+        by_config.setdefault(config_key(r["params"]), []).append(r)
+    rows = []
+    for number, params in enumerate(configs, start=1):
+        runs = by_config.get(config_key(params), [])
+        ped = np.array([r["collisions_ped"] for r in runs], dtype=float)
+        car = np.array([r["collisions_car"] for r in runs], dtype=float)
+        row = {'config': number, **resolve(params), 'n': len(runs)}
+        for name, values in (('ped', ped), ('car', car)):
+            row[f'collisions_{name}_mean'] = values.mean() if len(values) else None
+            row[f'collisions_{name}_std'] = values.std(ddof=1) if len(values) > 1 else None
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Przegląd parametrów symulacji skrzyżowania w puli procesów")
+    parser.add_argument("--grid", "-g", nargs="+", default=[], metavar="PARAMETR=W1,W2",
+                        help=f"siatka wartości (iloczyn kartezjański); parametry: {', '.join(PARAMETERS)}")
+    parser.add_argument("--configs", default=None,
+                        help="plik JSON z listą konfiguracji (słowniki parametrów); z --grid - każda z każdą")
+    parser.add_argument("--n", "-n", type=int, default=20, help="liczba przebiegów (ziaren) na konfigurację")
+    parser.add_argument("--duration", "-d", type=int, default=intersection.SIM_SECONDS,
+                        help="czas jednej symulacji w sekundach")
+    parser.add_argument("--arrivals", choices=["fixed", "poisson"], default="poisson",
+                        help="przyjazdy co stały odstęp albo proces Poissona")
+    parser.add_argument("--seed", type=int, default=None, help="ziarno główne przeglądu (domyślnie losowe)")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                        help="liczba procesów roboczych (domyślnie liczba rdzeni)")
+    parser.add_argument("--chunk", "-c", type=int, default=10,
+                        help="liczba przebiegów jednej konfiguracji w jednym zadaniu")
+    parser.add_argument("--output", "-o", default="przeglad.jsonl",
+                        help="plik JSONL z wynikami przebiegów, dopisywany na bieżąco (wznawianie)")
+    parser.add_argument("--table", "-t", default="przeglad.csv",
+                        help="tabela CSV z jednym wierszem na konfigurację")
+    parser.add_argument("--cache", default=".wyniki_cache",
+                        help="katalog pamięci podręcznej wyników (klucz: kod, konfiguracja, ziarno)")
+    parser.add_argument("--cache-size", type=int, default=200,
+                        help="największy rozmiar pamięci podręcznej w MB (nadmiar: najdawniej używane wpisy)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="licz wszystkie przebiegi od nowa, bez pamięci podręcznej")
+    args = parser.parse_args()
+
+    configs = load_configs(args.configs) if args.configs else [{}]
+    grid = parse_grid(args.grid)
+    configs = [{**params, **point} for params in configs for point in grid]
+    for params in configs:
+        if resolve(params)['variant'] not in intersection.VARIANTS:
+            raise SystemExit(f"Nieznany wariant: {params['variant']} (dostępne: {', '.join(intersection.VARIANTS)})")
+
+    store = ResultStore(args.output)
+    records = [
+        r for r in store.records()
+        if r["arrivals"] == args.arrivals and r["duration"] == args.duration
+    ]
+    base_seed = args.seed
+    if base_seed is None and records:
+        base_seed = records[-1]["base_seed"]
+    if base_seed is None:
+        base_seed = np.random.SeedSequence().entropy
+    print(f"Ziarno główne przeglądu: {base_seed}")
+
+    # Wszystkie konfiguracje z tymi samymi ziarnami - różnice wynikają z parametrów, nie z losowania
+    seeds = replica_seeds(base_seed, args.n)
+    done = {(config_key(r["params"]), r["seed"]) for r in records}
+    # Odcisk obejmuje sweep.py (sposób ustawiania parametrów) i cały silnik intersection.py
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size * 2 ** 20)
+    fingerprint = engine_fingerprint(__file__)
+
+    def cache_key(params, seed):
+        config = {'params': resolve(params), 'duration': args.duration, 'arrivals': args.arrivals}
+        return ResultCache.key(fingerprint, config, seed)
+
+    def record(params, seed, ped, car):
+        store.append({
+            "params": resolve(params), "seed": seed, "arrivals": args.arrivals,
+            "duration": args.duration, "collisions_ped": ped, "collisions_car": car,
+            "base_seed": base_seed,
+        })
+
+    with store:
+        jobs = []
+        for params in configs:
+            key = config_key(params)
+            todo = [seed for seed in seeds if (key, seed) not in done]
+            if cache is not None:
+                missing = []
+                for seed in todo:
+                    value = cache.get(cache_key(params, seed))
+                    if value is None:
+                        missing.append(seed)
+                    else:
+                        record(params, seed, value["collisions_ped"], value["collisions_car"])
+                todo = missing
+            for i in range(0, len(todo), args.chunk):
+                jobs.append((params, todo[i:i + args.chunk]))
+        total = sum(len(chunk) for _, chunk in jobs)
+        hits = f" (z pamięci podręcznej: {cache.hits})" if cache is not None and cache.hits else ""
+        print(f"{len(configs)} konfiguracji x {args.n} ziaren; do policzenia {total} przebiegów{hits}")
+
+        finished = 0
+        with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as pool:
+            futures = {
+                pool.submit(run_config, params, chunk, args.duration, args.arrivals): params
+                for params, chunk in jobs
+            }
+            for future in as_completed(futures):
+                params = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"[!] Błąd w konfiguracji {params}: {e}")
+                    continue
+                for seed, ped, car in results:
+                    record(params, seed, ped, car)
+                    if cache is not None:
+                        cache.put(cache_key(params, seed), {"collisions_ped": ped, "collisions_car": car})
+                finished += len(results)
+                print(f"[{finished}/{total}] {params or 'domyślna'}")
+    if cache is not None:
+        cache.evict()
+
+    seeds = set(seeds)
+    rows = summarize(configs, (r for r in store.records()
+                               if r["arrivals"] == args.arrivals and r["duration"] == args.duration
+                               and r["seed"] in seeds))
+    with open(args.table, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nWyniki przebiegów: {args.output}\nTabela konfiguracji: {args.table}")
+
+
+if __name__ == "__main__":
+    main()
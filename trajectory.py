@@ -0,0 +1,227 @@
+import argparse
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from arrivals import CROSSINGS, DIRECTIONS
+from intersection import FPS, HEIGHT, SPEEDS, WIDTH, Car, Pedestrian, draw_intersection
+
+# Zapis trajektorii do plików binarnych o stałym układzie rekordów, mapowanych w pamięci.
+#   <plik>         - jeden rekord TICK_RECORD na takt (sygnalizacja, liczniki, zakres agentów)
+#   <plik>.agents  - rekordy AGENT_RECORD: w każdym takcie najpierw pojazdy, potem piesi
+# Zapis zaczęty od migawki (takt start_tick) obejmuje tylko takty start_tick + 1, ...; takt t
+# leży pod indeksem t - first, więc przewijanie do dowolnego taktu to jedno odczytanie.
+
+TICK_RECORD = np.dtype([
+    ('tick', '<i4'),
+    ('light', 'u1'),             # faza dla pojazdów: 0 - NS, 1 - EW
+    ('pedestrian_light', 'u1'),
+    ('buffer_active', 'u1'),
+    ('pad', 'u1'),
+    ('ped_collisions', '<i4'),
+    ('car_collisions', '<i4'),
+    ('start', '<i8'),            # pierwszy rekord agenta w pliku .agents
+    ('cars', '<i4'),
+    ('pedestrians', '<i4'),
+])
+AGENT_RECORD = np.dtype([
+    ('id', '<i4'),               # numer agenta (osobna numeracja pojazdów i pieszych)
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('code', 'u1'),              # kierunek (arrivals.DIRECTIONS) albo przejście (arrivals.CROSSINGS)
+    ('pad', 'u1'),
+])
+PHASES = ('NS', 'EW')
+
+
+class TrajectoryRecorder:
+    def __init__(self, path, ticks, agents_per_tick=16, start_tick=0):
+        # ticks - liczba zapisywanych taktów; start_tick - sim.tick w chwili rozpoczęcia zapisu
+        self.path = path
+        self.start_tick = start_tick
+        self.agents_path = path + '.agents'
+        self.ticks = self._map(path, TICK_RECORD, ticks)
+        self.capacity = max(1, ticks * agents_per_tick)
+        self.agents = self._map(self.agents_path, AGENT_RECORD, self.capacity)
+        self.recorded = 0
+        self.used = 0
+
+    @staticmethod
+    def _map(path, dtype, n, mode='w+'):
+        return np.memmap(path, dtype=dtype, mode=mode, shape=(n,))
+
+    def _reserve(self, n):
+        if self.used + n <= self.capacity:
+            return
+        # Brak miejsca: plik agentów rośnie dwukrotnie (bez kopiowania zapisanych danych)
+        while self.used + n > self.capacity:
+            self.capacity *= 2
+        self.agents.flush()
+        del self.agents
+        with open(self.agents_path, 'r+b') as f:
+            f.truncate(self.capacity * AGENT_RECORD.itemsize)
+        self.agents = self._map(self.agents_path, AGENT_RECORD, self.capacity, mode='r+')
+
+    def record(self, sim):
+        # Wywoływane po sim.step(); działa z Simulation i NumpySimulation
+        if hasattr(sim, 'cars'):
+            car_id = [car.id for car in sim.cars]
+            car_xy = [(car.x, car.y) for car in sim.cars]
+            car_code = [DIRECTIONS.index(car.direction) for car in sim.cars]
+            ped_id = [ped.id for ped in sim.pedestrians]
+            ped_xy = [(ped.x, ped.y) for ped in sim.pedestrians]
+            ped_code = [CROSSINGS.index(ped.crossing) for ped in sim.pedestrians]
+        else:
+            car_id, car_xy, car_code = sim.car_id, sim.car_pos, sim.car_dir
+            ped_id, ped_xy, ped_code = sim.ped_id, sim.ped_pos, sim.ped_crossing
+        n_cars, n_peds = len(car_xy), len(ped_xy)
+        self._reserve(n_cars + n_peds)
+
+        start, middle, end = self.used, self.used + n_cars, self.used + n_cars + n_peds
+        agents = self.agents
+        if n_cars:
+            agents['id'][start:middle] = car_id
+            agents['code'][start:middle] = car_code
+            xy = np.asarray(car_xy)
+            agents['x'][start:middle] = xy[:, 0]
+            agents['y'][start:middle] = xy[:, 1]
+        if n_peds:
+            agents['id'][middle:end] = ped_id
+            agents['code'][middle:end] = ped_code
+            xy = np.asarray(ped_xy)
+            agents['x'][middle:end] = xy[:, 0]
+            agents['y'][middle:end] = xy[:, 1]
+
+        light = sim.light
+        row = self.ticks[sim.tick - self.start_tick - 1]
+        row['tick'] = sim.tick
+        row['light'] = PHASES.index(light.state)
+        row['pedestrian_light'] = PHASES.index(light.pedestrian_state)
+        row['buffer_active'] = light.buffer_active
+        row['ped_collisions'] = sim.ped_collision_count
+        row['car_collisions'] = sim.car_collision_count
+        row['start'] = start
+        row['cars'] = n_cars
+        row['pedestrians'] = n_peds
+        self.used = end
+        self.recorded = max(self.recorded, sim.tick - self.start_tick)
+
+    def close(self):
+        # Przycinamy pliki do zapisanej części
+        self.ticks.flush()
+        self.agents.flush()
+        del self.ticks, self.agents
+        with open(self.path, 'r+b') as f:
+            f.truncate(self.recorded * TICK_RECORD.itemsize)
+        with open(self.agents_path, 'r+b') as f:
+            f.truncate(self.used * AGENT_RECORD.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayCar:
+    __slots__ = ('id', 'x', 'y')
+    draw = Car.draw
+
+    def __init__(self, id, x, y):
+        self.id, self.x, self.y = id, x, y
+
+
+class ReplayPedestrian(ReplayCar):
+    __slots__ = ()
+    draw = Pedestrian.draw
+
+
+class Trajectory:
+    def __init__(self, path):
+        self.ticks = np.memmap(path, dtype=TICK_RECORD, mode='r')
+        agents_path = path + '.agents'
+        if os.path.getsize(agents_path):
+            self.agents = np.memmap(agents_path, dtype=AGENT_RECORD, mode='r')
+        else:
+            self.agents = np.zeros(0, dtype=AGENT_RECORD)
+        # Zakres zapisanych taktów first ... last (od 1, chyba że zapis zaczęto od migawki)
+        self.first = int(self.ticks[0]['tick']) if len(self.ticks) else 1
+        self.last = self.first + len(self.ticks) - 1
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def frame(self, tick):
+        # Stan z taktu tick (first ... last): sygnalizacja, pojazdy, piesi i liczniki kolizji
+        row = self.ticks[tick - self.first]
+        start, n_cars, n_peds = int(row['start']), int(row['cars']), int(row['pedestrians'])
+        agents = self.agents[start:start + n_cars + n_peds]
+        ids, xs, ys = agents['id'].tolist(), agents['x'].tolist(), agents['y'].tolist()
+        cars = [ReplayCar(*values) for values in zip(ids[:n_cars], xs[:n_cars], ys[:n_cars])]
+        pedestrians = [ReplayPedestrian(*values) for values in zip(ids[n_cars:], xs[n_cars:], ys[n_cars:])]
+        light = SimpleNamespace(
+            state=PHASES[row['light']],
+            pedestrian_state=PHASES[row['pedestrian_light']],
+            buffer_active=bool(row['buffer_active']),
+        )
+        return light, cars, pedestrians, int(row['ped_collisions']), int(row['car_collisions'])
+
+
+def replay(path, tick=None, speed='1'):
+    # Odtwarzanie zapisu bez symulowania. Klawisze: spacja - pauza, strzałki w lewo/prawo - ±1 s,
+    # w górę/dół - ±10 s, Home/End - początek/koniec, 1/2/3 - prędkość
+    import pygame
+    from render_cache import RenderCache
+
+    trajectory = Trajectory(path)
+    if len(trajectory) == 0:
+        print("Pusty zapis - nic do odtworzenia.")
+        return
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    cache = RenderCache()
+    keys = dict(zip((pygame.K_1, pygame.K_2, pygame.K_3), SPEEDS))
+    first, last = trajectory.first, trajectory.last
+    jumps = {pygame.K_LEFT: -FPS, pygame.K_RIGHT: FPS, pygame.K_UP: 10 * FPS, pygame.K_DOWN: -10 * FPS,
+             pygame.K_HOME: -len(trajectory), pygame.K_END: len(trajectory)}
+    position = float(first if tick is None else min(max(tick, first), last))
+    paused = False
+
+    while True:
+        frame_ms = clock.tick(FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key in keys:
+                    speed = keys[event.key]
+                elif event.key in jumps:
+                    position = min(max(position + jumps[event.key], first), last)
+
+        if not paused:
+            multiplier = SPEEDS[speed]
+            # Tryb max: co klatkę sekunda zapisu
+            position += FPS if multiplier is None else frame_ms * FPS / 1000 * multiplier
+            position = min(position, last)
+        tick = int(position)
+        pygame.display.set_caption(f"Odtwarzanie: takt {tick}/{last} (x{speed}{', pauza' if paused else ''})")
+        draw_intersection(win, cache, *trajectory.frame(tick), tick // FPS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtwarzanie zapisanej trajektorii symulacji skrzyżowania")
+    parser.add_argument("path", help="plik zapisu (--record w skrzyzowanie*.py / numpy_engine.py)")
+    parser.add_argument("--tick", type=int, default=None,
+                        help="takt, od którego zacząć odtwarzanie (domyślnie pierwszy zapisany)")
+    parser.add_argument("--speed", choices=list(SPEEDS), default="1", help="mnożnik prędkości odtwarzania")
+    args = parser.parse_args()
+    replay(args.path, args.tick, args.speed)
+
+
+if __name__ == "__main__":
+    main()